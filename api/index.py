@@ -1,15 +1,20 @@
-from flask import Flask, request, render_template_string, redirect, url_for, session, jsonify
+from flask import Flask, request, render_template_string, redirect, url_for, session, jsonify, Response, stream_with_context
 import os
 import json
 import time
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 import itertools
 import sys
 import math
+import re
 import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 # Instead of importing scraper and scheduled_update, we import our Supabase client from our dedicated module.
 from supabase_client import supabase
-from utils import time_test
+from utils import catalog, counting, equivalence, meeting_time, partials, ranking, snapshot, stream
+from utils.budget import Budget
+from utils.section import FIELDS, PARSED_COLUMNS, Section
 
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY")
@@ -68,21 +73,57 @@ def get_current_semester():
 
 CURRENT_SEMESTER = get_current_semester()
 
-def fetch_courses_from_supabase():
+# Number of schedule patterns shown per results page.
+PAGE_SIZE = 20
+# Requests whose section product is larger than this are paginated lazily from the
+# solver instead of being fully enumerated before the first page is rendered.
+STREAMING_THRESHOLD = int(os.getenv("STREAMING_THRESHOLD", "20000"))
+# Generation budget: seconds before partial results are returned (0 disables the
+# deadline) and the maximum number of schedules enumerated per request.
+GENERATION_TIMEOUT = float(os.getenv("GENERATION_TIMEOUT", "10"))
+MAX_RESULTS = int(os.getenv("MAX_RESULTS", "50000"))
+PROGRESS_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+# Number of schedules kept when results are sorted by a ranking criterion.
+RANKED_LIMIT = int(os.getenv("RANKED_LIMIT", "100"))
+# Worker processes for full enumeration (1 keeps it serial, e.g. on Vercel) and the
+# estimated product size above which the process pool is used. Self-hosted nodes
+# enabling workers will usually also raise STREAMING_THRESHOLD.
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "1"))
+PARALLEL_THRESHOLD = int(os.getenv("PARALLEL_THRESHOLD", "5000"))
+# Largest schedule set kept for incremental regeneration when a course is added or dropped.
+PARTIAL_CACHE_LIMIT = int(os.getenv("PARTIAL_CACHE_LIMIT", "100000"))
+# Seconds a semester catalog is kept in process memory, and how often the data
+# version of the last scraper run is checked to pick up fresh data earlier.
+CATALOG_TTL = int(os.getenv("CATALOG_TTL", "3600"))
+CATALOG_VERSION_INTERVAL = int(os.getenv("CATALOG_VERSION_INTERVAL", "60"))
+# Binary catalog snapshot written by api/scheduled_update.py, loaded at import time
+# from a local file or a Supabase Storage bucket (object "<semester>.msgpack").
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "")
+CATALOG_SNAPSHOT_BUCKET = os.getenv("CATALOG_SNAPSHOT_BUCKET", "")
+# Selected courses are recorded in course_selections for the scheduled update's
+# availability refresh, each at most once per this many seconds per instance.
+SELECTION_RECORD_INTERVAL = int(os.getenv("SELECTION_RECORD_INTERVAL", "300"))
+
+# Columns read from the courses table (in Section field order).
+COURSE_COLUMNS = ",".join(FIELDS + PARSED_COLUMNS)
+
+def fetch_course_records(semester, subject_codes=None):
     """
-    Fetch courses for the CURRENT_SEMESTER from Supabase by paginating through results.
-    Converts each row to a list in the order:
-    [subject_code, course_name, units, section, section_type, days, time, location, professor, availability, notes].
+    Fetch a semester's rows with seats available from the Supabase courses table
+    by paginating through results. With subject_codes, only the sections of those
+    courses are fetched.
     """
     batch_size = 1000
     offset = 0
     all_courses = []
     while True:
-        result = supabase.table("courses")\
-                         .select("*", count="exact")\
-                         .eq("semester", CURRENT_SEMESTER)\
-                         .range(offset, offset + batch_size - 1)\
-                         .execute()
+        query = supabase.table("courses")\
+                        .select(COURSE_COLUMNS)\
+                        .eq("semester", semester)\
+                        .eq("availability", "Seats Available")
+        if subject_codes is not None:
+            query = query.in_("subject_code", list(subject_codes))
+        result = query.range(offset, offset + batch_size - 1).execute()
         if result.data:
             all_courses.extend(result.data)
             if len(result.data) < batch_size:
@@ -90,22 +131,116 @@ def fetch_courses_from_supabase():
             offset += batch_size
         else:
             break
-    courses = []
-    for course in all_courses:
-        courses.append([
-            course.get("subject_code", ""),
-            course.get("course_name", ""),
-            course.get("units", ""),
-            course.get("section", ""),
-            course.get("section_type", ""),
-            course.get("days", ""),
-            course.get("time", ""),
-            course.get("location", ""),
-            course.get("professor", ""),
-            course.get("availability", ""),
-            course.get("notes", "")
-        ])
-    return courses
+    return all_courses
+
+def fetch_catalog_version(semester):
+    """
+    Data version of a semester's catalog: the finish time of the last scraper run
+    recorded in scrape_runs, or None if unknown.
+    """
+    try:
+        result = supabase.table("scrape_runs")\
+                         .select("finished_at")\
+                         .eq("semester", semester)\
+                         .order("finished_at", desc=True)\
+                         .limit(1)\
+                         .execute()
+        return result.data[0]["finished_at"] if result.data else None
+    except Exception as e:
+        print(f"Error fetching catalog version: {e}")
+        return None
+
+def load_catalog():
+    """The CURRENT_SEMESTER catalog, from process memory, the shared cache or Supabase."""
+    return catalog.get_catalog(CURRENT_SEMESTER, fetch_course_records, fetch_catalog_version,
+                               redis_client, CATALOG_TTL, CATALOG_VERSION_INTERVAL)
+
+def catalog_version():
+    """Data version of the CURRENT_SEMESTER catalog, checked at most every CATALOG_VERSION_INTERVAL seconds."""
+    return catalog.data_version(CURRENT_SEMESTER, fetch_catalog_version, CATALOG_VERSION_INTERVAL)
+
+def fetch_selected_courses(subject_codes):
+    """
+    Catalog covering the selected courses (see utils.catalog.Catalog for its indexes).
+    This is the cached catalog when this process has it loaded at the current data
+    version; otherwise (a cold instance, or a newer scraper run) Supabase is queried
+    for just these courses instead of scanning the whole catalog.
+    """
+    version = catalog_version()
+    current = catalog.cached_catalog(CURRENT_SEMESTER, CATALOG_TTL)
+    if current is not None and (version is None or current.version == version):
+        return current
+    records = fetch_course_records(CURRENT_SEMESTER, subject_codes) if subject_codes else []
+    return catalog.Catalog(CURRENT_SEMESTER, version, [Section.from_record(record) for record in records])
+
+_selections_recorded = {}
+_selections_lock = threading.Lock()
+# One background writer, so recording selections never holds up a request.
+_selections_writer = ThreadPoolExecutor(max_workers=1)
+
+def record_selections(course_codes):
+    """
+    Note the selected courses in the course_selections table, whose recent
+    subjects the scheduled update's availability refresh re-fetches. Courses this
+    instance recorded within SELECTION_RECORD_INTERVAL seconds are skipped; the
+    rest are written by a background thread (see write_selections).
+    """
+    now = time.monotonic()
+    with _selections_lock:
+        due = [code for code in dict.fromkeys(course_codes)
+               if now - _selections_recorded.get(code, -math.inf) >= SELECTION_RECORD_INTERVAL]
+        for code in due:
+            _selections_recorded[code] = now
+    if due:
+        _selections_writer.submit(write_selections, due)
+
+def write_selections(course_codes):
+    """Upsert course selections; on failure they are forgotten, so the next request retries them."""
+    try:
+        selected_at = datetime.now(timezone.utc).isoformat()
+        supabase.table("course_selections")\
+                .upsert([{"semester": CURRENT_SEMESTER, "subject_code": code, "selected_at": selected_at}
+                         for code in course_codes], on_conflict="semester,subject_code", returning="minimal")\
+                .execute()
+    except Exception as e:
+        print(f"Error recording course selections: {e}")
+        with _selections_lock:
+            for code in course_codes:
+                _selections_recorded.pop(code, None)
+
+def load_catalog_snapshot():
+    """
+    Install the scheduled update's catalog snapshot so a cold start needs no table scan.
+    The snapshot is used only if it is for the current semester and data version
+    (or, when the version is unknown, younger than CATALOG_TTL); otherwise the
+    catalog is loaded from Supabase on first use as usual.
+    """
+    loaded = None
+    if CATALOG_SNAPSHOT_PATH and os.path.exists(CATALOG_SNAPSHOT_PATH):
+        loaded = snapshot.read(CATALOG_SNAPSHOT_PATH)
+    elif CATALOG_SNAPSHOT_BUCKET:
+        try:
+            data = supabase.storage.from_(CATALOG_SNAPSHOT_BUCKET).download(f"{CURRENT_SEMESTER}.msgpack")
+            loaded = snapshot.decode(data)
+        except Exception as e:
+            print(f"Error downloading catalog snapshot: {e}")
+    if loaded is None:
+        return
+    semester, version, created, sections = loaded
+    if semester != CURRENT_SEMESTER or not sections:
+        return
+    current_version = fetch_catalog_version(semester)
+    if current_version is not None:
+        stale = version != current_version
+    else:
+        stale = time.time() - created > CATALOG_TTL
+    if stale:
+        print(f"Catalog snapshot is stale (version {version}), loading from Supabase instead")
+        return
+    catalog.install(catalog.Catalog(semester, version, sections))
+    print(f"Loaded {len(sections)} sections from the catalog snapshot (version {version})")
+
+load_catalog_snapshot()
 
 def clean_professor_name(name):
     """Remove extraneous text and periods from initials."""
@@ -178,6 +313,40 @@ def fetch_professor_details(professor_name):
         print(f"Error fetching RMP details for {professor_name}: {e}")
         return None
 
+def professor_rating(professor):
+    """RateMyProfessors rating of a professor as a float, or None if unknown or unrated."""
+    details = fetch_professor_details(professor)
+    if not details:
+        return None
+    try:
+        rating = float(details.get("rating"))
+    except (TypeError, ValueError):
+        return None
+    return rating if rating > 0 else None
+
+def class_professor_ratings(members):
+    """
+    Best professor rating of every time-equivalence class, used by the "rating" sort,
+    and the members of every class that earned it: the sections of its best-rated
+    professors, or the whole class when none is rated. Returns (ratings, rated members),
+    both keyed like members. Ratings are looked up concurrently and cached by
+    fetch_professor_details.
+    """
+    professors = {sec.professor.strip() for cls in members.values() for sec in cls if sec.professor.strip()}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        ratings = dict(zip(professors, executor.map(professor_rating, professors)))
+    class_ratings = {}
+    rated_members = {}
+    for key, cls in members.items():
+        known = [ratings[sec.professor.strip()] for sec in cls if ratings.get(sec.professor.strip()) is not None]
+        if known:
+            class_ratings[key] = max(known)
+            rated_members[key] = [sec for sec in cls if ratings.get(sec.professor.strip()) == class_ratings[key]]
+        else:
+            class_ratings[key] = ranking.UNKNOWN_RATING
+            rated_members[key] = cls
+    return class_ratings, rated_members
+
 def format_combination_as_calendar(combination):
     """
     Render a weekly calendar for a schedule combination.
@@ -198,26 +367,20 @@ def format_combination_as_calendar(combination):
     ]
     color_map = {}
     for sec in combination:
-        days_str = sec[5].strip()
+        days_str = sec.days.strip()
         day_list = days_str.split()
-        time_str = sec[6]
-        try:
-            start_str = time_str.split('-')[0]
-            start_time = datetime.strptime(start_str, "%I:%M%p")
-        except Exception:
-            start_time = None
-        if sec[0] not in color_map:
-            color_map[sec[0]] = color_classes[len(color_map) % len(color_classes)]
-        professor = sec[8].strip()
+        if sec.subject_code not in color_map:
+            color_map[sec.subject_code] = color_classes[len(color_map) % len(color_classes)]
+        professor = sec.professor.strip()
         event = {
-            "course": sec[0],
-            "section_type": sec[4],
-            "units": sec[2],
-            "time": sec[6],
-            "location": sec[7],
+            "course": sec.subject_code,
+            "section_type": sec.section_type,
+            "units": sec.units,
+            "time": sec.time,
+            "location": sec.location,
             "professor": professor,
-            "start": start_time,
-            "color": color_map[sec[0]]
+            "start": sec.start,
+            "color": color_map[sec.subject_code]
         }
         rating_info = fetch_professor_details(professor)
         if rating_info:
@@ -229,7 +392,7 @@ def format_combination_as_calendar(combination):
             if day in week:
                 week[day].append(event)
     for day in week:
-        week[day].sort(key=lambda e: e["start"] if e["start"] is not None else datetime.min)
+        week[day].sort(key=lambda e: e["start"] if e["start"] is not None else -1)
     html = '<div class="grid grid-cols-1 md:grid-cols-7 gap-4">'
     for day in ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]:
         html += f'<div><div class="font-bold text-center border-b pb-2">{day}</div>'
@@ -249,28 +412,32 @@ def format_combination_as_calendar(combination):
     html += '</div>'
     return html
 
-def event_overlaps_exclude_range(event_time, exclude_range):
-    try:
-        ev_start, ev_end = event_time.split('-')
-        ex_start, ex_end = exclude_range.split('-')
-        ev_start_dt = datetime.strptime(ev_start.strip(), "%I:%M%p")
-        ev_end_dt = datetime.strptime(ev_end.strip(), "%I:%M%p")
-        ex_start_dt = datetime.strptime(ex_start.strip(), "%I:%M%p")
-        ex_end_dt = datetime.strptime(ex_end.strip(), "%I:%M%p")
-        return ev_start_dt < ex_end_dt and ex_start_dt < ev_end_dt
-    except Exception:
-        return False
+def build_exclusion_masks(exclude_times, exclude_days, exclude_custom):
+    """
+    Compile the user's time filters once per request into meeting_time masks:
+    (excluded time ranges on any day, excluded weekdays, custom day/time slots).
+    """
+    times_mask = 0
+    for ex_time in exclude_times:
+        times_mask |= meeting_time.exclude_range_mask(ex_time)
+    days_bits = meeting_time.day_bits(" ".join(exclude_days))
+    custom = 0
+    for custom_day, cust_start, cust_end in exclude_custom:
+        custom |= meeting_time.custom_mask(custom_day, cust_start, cust_end)
+    return times_mask, days_bits, custom
 
-def event_overlaps_custom(event_time, custom_start, custom_end):
-    try:
-        ev_start, ev_end = event_time.split('-')
-        ev_start_dt = datetime.strptime(ev_start.strip(), "%I:%M%p")
-        ev_end_dt = datetime.strptime(ev_end.strip(), "%I:%M%p")
-        cust_start_dt = datetime.strptime(custom_start.strip(), "%H:%M")
-        cust_end_dt = datetime.strptime(custom_end.strip(), "%H:%M")
-        return ev_start_dt < cust_end_dt and cust_start_dt < ev_end_dt
-    except Exception:
-        return False
+def section_is_excluded(sec, exclude_professors, exclusion_masks):
+    """Check a single section against the user's filters with bitwise ANDs."""
+    times_mask, days_bits, custom = exclusion_masks
+    if sec.professor.strip() in exclude_professors:
+        return True
+    if times_mask and meeting_time.compile_parsed(meeting_time.ALL_DAYS, sec.start, sec.end) & times_mask:
+        return True
+    if days_bits and sec.day_bits & days_bits:
+        return True
+    if custom and sec.mask & custom:
+        return True
+    return False
 
 def schedule_signature(combination):
     """
@@ -279,14 +446,124 @@ def schedule_signature(combination):
     """
     sig = []
     for sec in combination:
-        days = sec[5].split()
-        time_val = sec[6].strip()
+        days = sec.days.split()
+        time_val = sec.time.strip()
         for day in days:
             if time_val.lower() not in ["", "na"]:
                 sig.append((day, time_val))
     sig.sort()
     return tuple(sig)
 
+def cache_get_json(key):
+    """Read a JSON value from the cache (Redis or the in-memory fallback), or None."""
+    cached = redis_client.get(key)
+    if not cached:
+        return None
+    try:
+        # Redis returns binary data - decode it first
+        if isinstance(cached, bytes):
+            cached = cached.decode('utf-8')
+        return json.loads(cached)
+    except Exception as e:
+        print(f"Error decoding cached value for {key}: {e}")
+        return None
+
+def cache_set_json(key, value):
+    """Write a JSON value to the cache for an hour."""
+    redis_client.set(key, json.dumps(value), ex=3600)
+
+def sections_from_rows(combos):
+    """Rebuild the Section records of cached class combinations (see Section.as_row)."""
+    return [[[Section.from_row(row) for row in cls] for cls in classes] for classes in combos]
+
+def render_group_calendars(combos):
+    """
+    Expand a group's combinations of time-equivalent classes into concrete
+    schedules and render each as a calendar, dropping duplicate calendars.
+    """
+    return list(dict.fromkeys(format_combination_as_calendar(comb)
+                              for classes in combos for comb in equivalence.expand(classes)))
+
+def schedule_totals(cache_key, course_options, members, budget):
+    """
+    Total valid and distinct schedules for a request, counted through the search tree
+    without enumerating them (see utils.counting) and cached next to the results.
+    Counting shares the request's deadline; returns (None, None) if it cannot finish.
+    """
+    totals_key = cache_key + ":totals"
+    totals = cache_get_json(totals_key)
+    if totals is None:
+        weights = [lambda opt: equivalence.count_valid(equivalence.classes_of(opt, members)),
+                   lambda opt: equivalence.count_unique(equivalence.classes_of(opt, members))]
+        totals = counting.count_schedules(course_options, weights, Budget(budget.remaining()))
+        if totals is None:
+            print("Schedule count did not finish within the time budget")
+            return None, None
+        redis_client.set(totals_key, json.dumps(totals), ex=3600)
+    return tuple(totals)
+
+def render_streamed_page(cache_key, version, course_options, members, online_sections, page, budget):
+    """
+    Render one results page for a large request without enumerating every schedule.
+    Pages are built in order, each resuming the solver from the cursor saved after the
+    previous page; built pages are cached so revisiting a page never recomputes it.
+    A page cut short by the budget is flagged truncated and the next page resumes
+    where it stopped. The number of pages is unknown in this mode; totals are counted
+    separately without enumeration. The cursor indexes course_options as built from
+    the catalog at data version version, so a new version restarts the stream.
+    """
+    state_key = cache_key + ":stream"
+    state = cache_get_json(state_key)
+    if state is None or state.get("version") != version:
+        state = {"version": version, "pages": 0, "cursor": [], "seen": [], "truncated_pages": []}
+    page = max(page, 1)
+    seen = set(state["seen"])
+    while state["pages"] < page and state["cursor"] is not None and not budget.truncated:
+        groups, next_cursor, continued = stream.collect_page(course_options, state["cursor"], seen,
+                                                             PAGE_SIZE, schedule_signature, budget)
+        page_items = []
+        for sig, combs in sorted(groups, key=lambda x: x[0]):
+            combos = [equivalence.classes_of(comb, members) for comb in combs]
+            page_items.append((list(sig), render_group_calendars(combos), sig in continued))
+        state["pages"] += 1
+        redis_client.set(f"{cache_key}:page:{state['pages']}", json.dumps(page_items), ex=3600)
+        if budget.truncated:
+            state.setdefault("truncated_pages", []).append(state["pages"])
+        state["cursor"] = next_cursor
+        state["seen"] = sorted(seen)
+        redis_client.set(state_key, json.dumps(state), ex=3600)
+
+    page = min(page, max(state["pages"], 1))
+    page_items = cache_get_json(f"{cache_key}:page:{page}") or []
+    paginated_groups = {}
+    continued_groups = set()
+    # Pages cached before continuation groups existed have no continued flag.
+    for sig_list, calendars, *flags in page_items:
+        sig = tuple(tuple(item) for item in sig_list)
+        paginated_groups[sig] = calendars
+        if flags and flags[0]:
+            continued_groups.add(sig)
+    has_next = page < state["pages"] or state["cursor"] is not None
+    truncated = page in state.get("truncated_pages", [])
+    total_valid, total_unique = schedule_totals(cache_key, course_options, members, budget)
+
+    print(f"Rendering streamed page {page} with {len(paginated_groups)} groups (more: {has_next})")
+
+    return render_template_string(result_template, groups=paginated_groups, total_count=total_unique,
+                                  total_valid=total_valid, total_unique=total_unique,
+                                  online_sections=online_sections, current_page=page,
+                                  total_pages=None, has_next=has_next, truncated=truncated,
+                                  cache_key=cache_key, continued=continued_groups)
+
+def progress_reporter(progress_id):
+    """Budget progress callback that publishes counters for the /progress event stream."""
+    if not progress_id:
+        return None
+    key = "progress:" + progress_id
+    def report(progress):
+        redis_client.set(key, json.dumps(progress), ex=300)
+    return report
+
 # ------------------------------
 # Frontend Templates
 # ------------------------------
@@ -589,6 +866,18 @@ form_template = """
                 </button>
               </div>
             </div>
+            <div class="select-container">
+              <label for="sort_by" class="form-label">Sort Schedules By</label>
+              <select id="sort_by" name="sort_by" class="w-full p-2 border border-gray-200 rounded-md">
+                <option value="" {% if not sort_by %}selected{% endif %}>Schedule pattern (show all)</option>
+                {% for value, label in sort_options.items() %}
+                  <option value="{{ value }}" {% if value == sort_by %}selected{% endif %}>{{ label }}</option>
+                {% endfor %}
+              </select>
+              <p class="small-hint">
+                Sorted results show only the best {{ ranked_limit }} schedules.
+              </p>
+            </div>
             
             <button type="submit" id="submitBtn" class="submit-button w-full text-white py-3 px-4 rounded-md mt-6 flex items-center justify-center">
               <svg xmlns="http://www.w3.org/2000/svg" class="h-5 w-5 mr-2" viewBox="0 0 20 20" fill="currentColor">
@@ -596,6 +885,7 @@ form_template = """
               </svg>
               Generate Schedules
             </button>
+            <input type="hidden" name="progress_id" id="progressId">
           </form>
         </div>
       </div>
@@ -609,6 +899,7 @@ form_template = """
   <div class="loading" id="loadingOverlay">
     <div class="loading-spinner"></div>
     <p class="text-gray-700">Generating your schedules...</p>
+    <p id="progressText" class="text-gray-500 text-sm mt-2"></p>
   </div>
   
   <script>
@@ -680,6 +971,24 @@ form_template = """
     // Form submission with loading overlay
     document.getElementById("courseForm").addEventListener("submit", function() {
       document.getElementById("loadingOverlay").style.display = "flex";
+      
+      // Follow generation progress over server-sent events
+      const progressId = Math.random().toString(36).slice(2) + Date.now().toString(36);
+      document.getElementById("progressId").value = progressId;
+      if (window.EventSource) {
+        const source = new EventSource("{{ url_for('progress') }}?id=" + progressId);
+        source.onmessage = function(event) {
+          const progress = JSON.parse(event.data);
+          document.getElementById("progressText").textContent =
+            `Explored ${progress.explored.toLocaleString()} combinations, found ${progress.found.toLocaleString()} valid (${progress.elapsed}s)`;
+          if (progress.done) {
+            source.close();
+          }
+        };
+        source.onerror = function() {
+          source.close();
+        };
+      }
     });
     
     // Animate form elements on load
@@ -985,7 +1294,7 @@ result_template = """
                 <li class="p-2 bg-white rounded-md shadow-sm">
                   <strong class="text-green-700">{{ code }}:</strong>
                   {% for sec in sections %}
-                    <span class="ml-2">{{ sec[4] }} - {{ sec[8] }}</span>
+                    <span class="ml-2">{{ sec.section_type }} - {{ sec.professor }}</span>
                     {% if not loop.last %}<br class="ml-6">{% endif %}
                   {% endfor %}
                 </li>
@@ -994,17 +1303,24 @@ result_template = """
           </div>
         {% endif %}
         
+        {% if truncated %}
+          <div class="p-4 mb-6 bg-yellow-50 border border-yellow-300 rounded-md text-yellow-800 text-center">
+            Schedule generation hit its time or result limit, so these results are partial.
+            Narrow your course selection or add filters to see every schedule.
+          </div>
+        {% endif %}
+        
         {% if groups %}
           <div class="stats-container rounded-md mb-6 animate__animated animate__fadeInUp animate__delay-1s">
             <h2 class="text-lg font-semibold text-center text-gray-700">Schedule Statistics</h2>
             <div class="grid grid-cols-1 md:grid-cols-3 gap-4 mt-3 text-center">
               <div class="stat-item p-3 bg-white rounded-md shadow-sm">
                 <div class="text-sm text-gray-500">Total Valid Combinations</div>
-                <div class="text-xl font-bold text-blue-600">{{ total_valid }}</div>
+                <div class="text-xl font-bold text-blue-600">{{ total_valid if total_valid is not none else '—' }}</div>
               </div>
               <div class="stat-item p-3 bg-white rounded-md shadow-sm">
                 <div class="text-sm text-gray-500">Unique Schedules</div>
-                <div class="text-xl font-bold text-blue-600">{{ total_unique }}</div>
+                <div class="text-xl font-bold text-blue-600">{{ total_unique if total_unique is not none else '—' }}</div>
               </div>
               <div class="stat-item p-3 bg-white rounded-md shadow-sm">
                 <div class="text-sm text-gray-500">Schedule Patterns</div>
@@ -1013,7 +1329,7 @@ result_template = """
             </div>
           </div>
           
-          {% if total_count > 100 %}
+          {% if total_count and total_count > 100 %}
             <div class="info-message p-3 bg-blue-50 border border-blue-200 rounded-md mb-6 text-center animate__animated animate__fadeIn animate__delay-1s">
               <p class="text-blue-700">
                 Showing {{ groups|length }} schedule patterns out of {{ total_count }} valid combinations.
@@ -1030,6 +1346,7 @@ result_template = """
                     {{ loop.index }}
                   </span>
                   Schedule Pattern: {{ calendars|length }} schedule{% if calendars|length > 1 %}s{% endif %}
+                  {% if continued and sig in continued %}<span class="ml-2 text-sm font-normal text-gray-500">(continued from an earlier page)</span>{% endif %}
                 </h3>
                 
                 <div class="day-time-grid mt-2">
@@ -1055,7 +1372,7 @@ result_template = """
             </div>
           {% endfor %}
           
-          {% if total_pages > 1 %}
+          {% if (total_pages and total_pages > 1) or has_next or current_page > 1 %}
             <div class="pagination animate__animated animate__fadeInUp animate__delay-2s">
               <div class="flex items-center space-x-2">
                 {% if current_page > 1 %}
@@ -1079,19 +1396,21 @@ result_template = """
               
               <div class="text-center">
                 <span class="px-3 py-1 bg-blue-100 rounded-full text-blue-800 font-medium">
-                  Page {{ current_page }} of {{ total_pages }}
+                  Page {{ current_page }}{% if total_pages %} of {{ total_pages }}{% endif %}
                 </span>
               </div>
               
               <div class="flex items-center space-x-2">
-                {% if current_page < total_pages %}
+                {% if (total_pages and current_page < total_pages) or has_next %}
                   <a href="{{ url_for('generate') }}?page={{ current_page + 1 }}&key={{ cache_key }}" class="page-button text-white font-medium py-2 px-4 rounded inline-flex items-center">
                     Next
                     <svg xmlns="http://www.w3.org/2000/svg" class="h-5 w-5 ml-1" viewBox="0 0 20 20" fill="currentColor">
                       <path fill-rule="evenodd" d="M7.293 14.707a1 1 0 010-1.414L10.586 10 7.293 6.707a1 1 0 011.414-1.414l4 4a1 1 0 010 1.414l-4 4a1 1 0 01-1.414 0z" clip-rule="evenodd" />
                     </svg>
                   </a>
-                  <a href="{{ url_for('generate') }}?page={{ total_pages }}&key={{ cache_key }}" class="px-3 py-1 bg-gray-200 rounded hover:bg-gray-300 text-sm">Last</a>
+                  {% if total_pages %}
+                    <a href="{{ url_for('generate') }}?page={{ total_pages }}&key={{ cache_key }}" class="px-3 py-1 bg-gray-200 rounded hover:bg-gray-300 text-sm">Last</a>
+                  {% endif %}
                 {% else %}
                   <button disabled class="bg-gray-300 text-gray-500 font-medium py-2 px-4 rounded inline-flex items-center cursor-not-allowed">
                     Next
@@ -1158,19 +1477,22 @@ result_template = """
 @app.template_filter('datetimeformat')
 def datetimeformat(value):
     if isinstance(value, str):
-        return value
+        try:
+            value = datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return value
     return datetime.utcfromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S UTC")
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    courses = fetch_courses_from_supabase()
-    last_updated = None
-    distinct_courses = sorted({ (course[0], course[1]) for course in courses })
+    current = load_catalog()
+    last_updated = current.version
+    distinct_courses = current.courses
     selected = session.get("selected_courses", [])
     if selected:
-        all_profs = { course[8].strip() for course in courses if course[0] in selected and course[8].strip() }
+        all_profs = current.professors_for(selected)
     else:
-        all_profs = { course[8].strip() for course in courses if course[8].strip() }
+        all_profs = current.professors
     time_ranges = [
         "08:00AM-09:00AM", "09:00AM-10:00AM", "10:00AM-11:00AM", "11:00AM-12:00PM",
         "12:00PM-01:00PM", "01:00PM-02:00PM", "02:00PM-03:00PM", "03:00PM-04:00PM",
@@ -1181,11 +1503,14 @@ def index():
     exclude_times = session.get("exclude_times", [])
     exclude_days = session.get("exclude_days", [])
     exclude_custom = session.get("exclude_custom", [])
+    sort_by = session.get("sort_by", "")
     return render_template_string(form_template, semester=CURRENT_SEMESTER, courses=distinct_courses,
-                                  selected_courses=selected, professors=sorted(all_profs),
+                                  selected_courses=selected, professors=all_profs,
                                   time_ranges=time_ranges, exclude_professors=exclude_professors,
                                   exclude_times=exclude_times, exclude_days=exclude_days,
-                                  exclude_custom=exclude_custom, last_updated=last_updated)
+                                  exclude_custom=exclude_custom, sort_by=sort_by,
+                                  sort_options=ranking.SORT_OPTIONS, ranked_limit=RANKED_LIMIT,
+                                  last_updated=last_updated)
 
 @app.route("/generate", methods=["GET", "POST"])
 def generate():
@@ -1194,6 +1519,7 @@ def generate():
         # Process form data
         selected_courses = request.form.getlist("courses")
         session["selected_courses"] = selected_courses
+        record_selections(selected_courses)
         exclude_professors = request.form.getlist("exclude_professors")
         session["exclude_professors"] = exclude_professors
         exclude_times = request.form.getlist("exclude_times")
@@ -1208,6 +1534,10 @@ def generate():
             if day and start and end:
                 exclude_custom.append((day.strip(), start.strip(), end.strip()))
         session["exclude_custom"] = exclude_custom
+        sort_by = request.form.get("sort_by", "")
+        if sort_by not in ranking.SORT_OPTIONS:
+            sort_by = ""
+        session["sort_by"] = sort_by
         
         # Store the cache key in the session
         cache_data = {
@@ -1216,8 +1546,12 @@ def generate():
             "exclude_times": exclude_times,
             "exclude_days": exclude_days,
             "exclude_custom": exclude_custom,
+            "sort_by": sort_by,
+            # Results are cached per catalog data version, so a scraper run or
+            # availability refresh is reflected on the next submission.
+            "version": catalog_version(),
         }
-        cache_key = "schedule:" + hashlib.md5(json.dumps(cache_data, sort_keys=True).encode('utf-8')).hexdigest()
+        cache_key = "schedule:v2:" + hashlib.md5(json.dumps(cache_data, sort_keys=True).encode('utf-8')).hexdigest()
         session["cache_key"] = cache_key
     else:
         # For GET requests (pagination), try to get the key from URL first, then session
@@ -1240,12 +1574,27 @@ def generate():
         exclude_times = session.get("exclude_times", [])
         exclude_days = session.get("exclude_days", [])
         exclude_custom = session.get("exclude_custom", [])
+        sort_by = session.get("sort_by", "")
+
+    # Generation budget; progress is published for the /progress event stream
+    progress_id = request.values.get("progress_id", "")
+    if not PROGRESS_ID_PATTERN.fullmatch(progress_id):
+        progress_id = ""
+    budget = Budget(GENERATION_TIMEOUT or None, MAX_RESULTS or None,
+                    on_progress=progress_reporter(progress_id))
+    try:
+        return render_results(cache_key, selected_courses, exclude_professors, exclude_times,
+                              exclude_days, exclude_custom, sort_by, budget)
+    finally:
+        # Every exit (cache hits, empty results, errors) ends the /progress stream,
+        # which otherwise keeps polling until it gives up.
+        budget.report(done=True)
+
+def render_results(cache_key, selected_courses, exclude_professors, exclude_times,
+                   exclude_days, exclude_custom, sort_by, budget):
+    """Results page of a generation request, from the cache or generated under budget."""
+    truncated = False
 
-    # Fetch course data
-    courses = fetch_courses_from_supabase()
-    if not courses:
-        return "No course data available."
-    
     # Check Redis for cached data using the cache_key
     # Update the Redis cached data retrieval section:
 
@@ -1262,13 +1611,15 @@ def generate():
             # Convert the group_items correctly from serializable format
             group_items_serializable = cached_data["group_items"]
             group_items = []
-            for sig_list, calendars in group_items_serializable:
+            for sig_list, combos in group_items_serializable:
                 tuple_sig = tuple(tuple(item) if isinstance(item, list) else item for item in sig_list)
-                group_items.append((tuple_sig, calendars))
+                group_items.append((tuple_sig, combos))
             
             total_valid = cached_data["total_valid"]
             total_unique = cached_data["total_unique"]
-            online_sections = cached_data.get("online_sections", {})
+            online_sections = {code: [Section.from_row(row) for row in secs]
+                               for code, secs in cached_data.get("online_sections", {}).items()}
+            truncated = cached_data.get("truncated", False)
             
             print(f"Retrieved from cache: {len(group_items)} groups")
         except Exception as e:
@@ -1278,23 +1629,15 @@ def generate():
             
     if not cached:
         print(f"Cache miss for key: {cache_key}")
-        # Process course data to identify online sections and in-person courses
-        online_sections = {}
-        inperson_courses_by_code = {}
-        for course in courses:
-            code = course[0]
-            time_field = course[6].strip().lower()
-            comment_field = course[10].strip().lower()
-            if code in selected_courses:
-                if course[9] == "Seats Available" and (time_field in ["", "na"]) and (
-                    "online-no meet times" in comment_field or 
-                    "no-meet times" in comment_field or 
-                    "online no meet times" in comment_field):
-                    if not course[4].strip():
-                        course[4] = "Online"
-                    online_sections.setdefault(code, []).append(course)
-                elif course[9] == "Seats Available" and time_field not in ["", "na"]:
-                    inperson_courses_by_code.setdefault(code, {}).setdefault(course[4], []).append(course)
+        # Fetch only the selected courses' sections
+        selected_catalog = fetch_selected_courses(selected_courses)
+        
+        # Online sections and in-person sections by type of the selected courses,
+        # from the indexes built when the catalog was loaded
+        selected = set(selected_courses)
+        online_sections = {code: secs for code, secs in selected_catalog.online.items() if code in selected}
+        inperson_courses_by_code = {code: secs_by_type for code, secs_by_type in selected_catalog.inperson.items()
+                                    if code in selected}
         
         # Check if all selected courses have available sections
         for code in selected_courses:
@@ -1309,13 +1652,17 @@ def generate():
                     total_pages=1)
         
         # Identify required section types for each course
-        required_types_by_code = {}
-        for code in inperson_courses_by_code:
-            for sec in sum(inperson_courses_by_code.get(code, {}).values(), []):
-                required_types_by_code.setdefault(code, set()).add(sec[4])
+        required_types_by_code = {code: set(secs_by_type) for code, secs_by_type in inperson_courses_by_code.items()}
         
-        # Filter to only include courses with available sections
-        courses_for_combinations = {code: secs for code, secs in inperson_courses_by_code.items() if secs}
+        # Apply user filters to individual sections before enumeration, so excluded
+        # sections never enter the product space
+        exclusion_masks = build_exclusion_masks(exclude_times, exclude_days, exclude_custom)
+        courses_for_combinations = {}
+        for code, secs_by_type in inperson_courses_by_code.items():
+            courses_for_combinations[code] = {
+                sec_type: [sec for sec in secs if not section_is_excluded(sec, exclude_professors, exclusion_masks)]
+                for sec_type, secs in secs_by_type.items()
+            }
         
         # Check if there are any in-person courses
         if not courses_for_combinations:
@@ -1328,10 +1675,10 @@ def generate():
                                          current_page=1, 
                                          total_pages=1)
         
-        # Check if all required section types are available
+        # Check if all required section types still have sections after filtering
         for code in courses_for_combinations:
             required = required_types_by_code.get(code, set())
-            available = set(courses_for_combinations.get(code, {}).keys())
+            available = {t for t, secs in courses_for_combinations.get(code, {}).items() if secs}
             if not required.issubset(available):
                 return render_template_string(result_template,
                     groups={},
@@ -1342,6 +1689,13 @@ def generate():
                     current_page=1,
                     total_pages=1)
         
+        # Collapse time-equivalent sections into one representative per class, so the
+        # search grows with distinct time patterns rather than raw section count
+        members = {}
+        for code in courses_for_combinations:
+            for sec_type, secs in courses_for_combinations[code].items():
+                courses_for_combinations[code][sec_type] = equivalence.collapse(secs, members)
+        
         # Generate combinations of sections for each course
         course_combinations = {}
         for code in courses_for_combinations:
@@ -1349,104 +1703,82 @@ def generate():
             sections_lists = [courses_for_combinations[code][t] for t in types]
             course_combinations[code] = list(itertools.product(*sections_lists))
         
-        # Generate all possible schedule combinations
-        overall_combinations = list(itertools.product(*[course_combinations[code] for code in courses_for_combinations]))
-        
-        # Find valid combinations (no time conflicts)
-        valid_combinations = []
-        for overall in overall_combinations:
-            schedule_sections = []
-            for sections_tuple in overall:
-                schedule_sections.extend(sections_tuple)
-            conflict = False
-            n = len(schedule_sections)
-            for i in range(n):
-                for j in range(i+1, n):
-                    sec1 = schedule_sections[i]
-                    sec2 = schedule_sections[j]
-                    sec1_time = sec1[6].strip().lower()
-                    sec2_time = sec2[6].strip().lower()
-                    if ("na" in sec1_time or sec1_time == "" or
-                        "na" in sec2_time or sec2_time == ""):
-                        continue
-                    if time_test.are_time_windows_in_conflict(sec1[5], sec1[6], sec2[5], sec2[6]):
-                        conflict = True
-                        break
-                if conflict:
-                    break
-            if not conflict:
-                valid_combinations.append(schedule_sections)
+        course_options = [course_combinations[code] for code in courses_for_combinations]
         
-        # Apply user filters
-        filtered_combinations = []
-        for comb in valid_combinations:
-            skip = False
-            for sec in comb:
-                prof = sec[8].strip()
-                if prof in exclude_professors:
-                    skip = True
-                    break
-                for ex_time in exclude_times:
-                    if event_overlaps_exclude_range(sec[6], ex_time):
-                        skip = True
-                        break
-                if skip:
-                    break
-                event_days = sec[5].split()
-                if any(day in event_days for day in exclude_days):
-                    skip = True
-                    break
-                for custom in exclude_custom:
-                    custom_day, cust_start, cust_end = custom
-                    if custom_day in sec[5].split() and event_overlaps_custom(sec[6], cust_start, cust_end):
-                        skip = True
-                        break
-                if skip:
-                    break
-            if not skip:
-                filtered_combinations.append(comb)
+        # Ranked requests keep only the best RANKED_LIMIT schedules (branch-and-bound),
+        # grouped by pattern in rank order; totals are counted without enumeration
+        if sort_by:
+            rating = None
+            shown = members
+            if sort_by == "rating":
+                # A class is scored by its best-rated professor, so only that professor's
+                # sections are shown for it; the others would not earn the schedule's rank.
+                class_ratings, shown = class_professor_ratings(members)
+                rating = lambda rep: class_ratings[equivalence.class_key(rep)]
+            ranked = ranking.top_schedules(course_options, sort_by, RANKED_LIMIT, rating, budget)
+            groups = {}
+            for _, comb in ranked:
+                groups.setdefault(schedule_signature(comb), []).append(equivalence.classes_of(comb, shown))
+            group_items = list(groups.items())
+            total_valid, total_unique = schedule_totals(cache_key, course_options, members, budget)
+            truncated = budget.truncated
+            redis_client.set(cache_key, json.dumps({
+                "group_items": [(list(sig), combos) for sig, combos in group_items],
+                "total_valid": total_valid,
+                "total_unique": total_unique,
+                "online_sections": online_sections,
+                "truncated": truncated
+            }, default=Section.as_row), ex=3600)
         
-        # Track total number of valid combinations
-        total_valid = len(filtered_combinations)
+        # Large requests are paginated lazily, straight from the solver
+        elif math.prod(len(options) for options in course_options) > STREAMING_THRESHOLD:
+            return render_streamed_page(cache_key, selected_catalog.version, course_options, members,
+                                        online_sections, int(request.args.get("page", 1)), budget)
         
-        # Deduplicate combinations
-        unique_combinations = []
-        seen = set()
-        for comb in filtered_combinations:
-            # Create a canonical representation
-            rep = tuple(sorted((sec[0], sec[3], sec[5].strip(), sec[6].strip()) for sec in comb))
-            if rep not in seen:
-                seen.add(rep)
-                unique_combinations.append(comb)
-        
-        total_unique = len(unique_combinations)
+        else:
+            # Enumerate conflict-free schedules course by course, backtracking on the first conflict
+            # (across worker processes for large inputs when SCHEDULER_WORKERS > 1), or reuse the
+            # cached schedules of an earlier request for the same courses or all but one of them.
+            # User filters were already applied to the sections, so every schedule is kept.
+            # Each schedule is made of representatives; expand it into its member classes.
+            # If the budget runs out, the schedules found so far are shown as partial results.
+            class_combinations = [equivalence.classes_of(comb, members)
+                                  for comb in partials.iter_valid_schedules(course_options, cache_get_json, cache_set_json,
+                                                                            SCHEDULER_WORKERS, PARALLEL_THRESHOLD,
+                                                                            PARTIAL_CACHE_LIMIT, budget)]
+            truncated = budget.truncated
         
-        # Group schedules by their days and times
-        groups = {}
-        for comb in unique_combinations:
-            sig = schedule_signature(comb)
-            cal = format_combination_as_calendar(comb)
-            groups.setdefault(sig, []).append(cal)
+            # Track total number of valid and distinct (deduplicated) combinations; they are
+            # counted separately so they stay exact when the enumeration was cut short
+            if truncated:
+                total_valid, total_unique = schedule_totals(cache_key, course_options, members, budget)
+            else:
+                total_valid = sum(equivalence.count_valid(classes) for classes in class_combinations)
+                total_unique = sum(equivalence.count_unique(classes) for classes in class_combinations)
         
-        # Deduplicate calendars within each group
-        for sig in groups:
-            groups[sig] = list(dict.fromkeys(groups[sig]))
+            # Group schedules by their days and times (shared by every member of a class)
+            groups = {}
+            for classes in class_combinations:
+                sig = schedule_signature([cls[0] for cls in classes])
+                groups.setdefault(sig, []).append(classes)
         
-        # Sort groups by signature
-        group_items = sorted(groups.items(), key=lambda x: x[0])
+            # Sort groups by signature
+            group_items = sorted(groups.items(), key=lambda x: x[0])
         
-        # Convert to serializable format for caching
-        group_items_serializable = [(list(sig), calendars) for sig, calendars in group_items]
-        cache_value = {
-            "group_items": group_items_serializable,
-            "total_valid": total_valid,
-            "total_unique": total_unique,
-            "online_sections": online_sections
-        }
-        redis_client.set(cache_key, json.dumps(cache_value), ex=3600)
+            # Convert to serializable format for caching (sections are stored as rows);
+            # calendars are rendered per page
+            group_items_serializable = [(list(sig), combos) for sig, combos in group_items]
+            cache_value = {
+                "group_items": group_items_serializable,
+                "total_valid": total_valid,
+                "total_unique": total_unique,
+                "online_sections": online_sections,
+                "truncated": truncated
+            }
+            redis_client.set(cache_key, json.dumps(cache_value, default=Section.as_row), ex=3600)
 
     # Pagination
-    page_size = 20
+    page_size = PAGE_SIZE
     page = int(request.args.get("page", 1))
     total_pages = math.ceil(len(group_items) / page_size) if group_items else 1
     
@@ -1458,15 +1790,47 @@ def generate():
     start_index = (page - 1) * page_size
     end_index = start_index + page_size
     
-    # Create a dictionary from the sliced group_items
-    paginated_groups = dict(group_items[start_index:end_index])
+    # Expand and render only the groups on the requested page (cached groups hold rows)
+    paginated_groups = {sig: render_group_calendars(sections_from_rows(combos) if cached else combos)
+                        for sig, combos in group_items[start_index:end_index]}
     
     print(f"Rendering page {page} of {total_pages} with {len(paginated_groups)} groups")
     
     return render_template_string(result_template, groups=paginated_groups, total_count=total_unique,
                                  total_valid=total_valid, total_unique=total_unique,
                                  online_sections=online_sections, current_page=page, 
-                                 total_pages=total_pages, cache_key=cache_key)
+                                 total_pages=total_pages, truncated=truncated, cache_key=cache_key)
+
+@app.route("/progress")
+def progress():
+    """
+    Server-sent events with the progress of the generation started with ?id=.
+    An event is sent whenever the counters change, until generation is done.
+    Behind a server that buffers whole responses (WSGIAdapter) the events could
+    only arrive after generation ended, so the stream is refused with 204, which
+    tells the browser not to reconnect.
+    """
+    if request.environ.get("scheduler.buffered"):
+        return "", 204
+    progress_id = request.args.get("id", "")
+    if not PROGRESS_ID_PATTERN.fullmatch(progress_id):
+        return jsonify({"error": "Invalid progress id"}), 400
+    key = "progress:" + progress_id
+    give_up = time.monotonic() + (GENERATION_TIMEOUT or 60) + 30
+
+    def events():
+        last = None
+        while time.monotonic() < give_up:
+            current = cache_get_json(key)
+            if current is not None and current != last:
+                last = current
+                yield f"data: {json.dumps(current)}\n\n"
+                if current.get("done"):
+                    return
+            time.sleep(0.5)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 from http.server import BaseHTTPRequestHandler
 from io import BytesIO
@@ -1492,6 +1856,8 @@ class WSGIAdapter(BaseHTTPRequestHandler):
         environ['wsgi.multiprocess'] = False
         environ['wsgi.run_once'] = False
         environ['wsgi.url_scheme'] = 'http'
+        # The response is sent in one piece below, so streaming responses are buffered.
+        environ['scheduler.buffered'] = True
         length = self.headers.get('Content-Length')
         if length:
             environ['CONTENT_LENGTH'] = length
@@ -1,12 +1,16 @@
+import asyncio
 import os
 import json
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
 
 # Ensure the parent directory is in the path so we can import the scraper module.
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from scraper import scraper
+from utils import bulk, snapshot
+from utils.section import FIELDS, PARSED_COLUMNS, Section
 
 # Load Supabase credentials from environment variables (set in Lambda configuration)
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
@@ -30,59 +34,490 @@ def get_current_semester():
 
 CURRENT_SEMESTER = get_current_semester()
 
-def clear_table():
+# Where to publish the binary catalog snapshot read by the web app at cold start:
+# a local file and/or a Supabase Storage bucket (object "<semester>.msgpack").
+CATALOG_SNAPSHOT_PATH = os.environ.get("CATALOG_SNAPSHOT_PATH", "")
+CATALOG_SNAPSHOT_BUCKET = os.environ.get("CATALOG_SNAPSHOT_BUCKET", "")
+
+# Set to 1 to re-download and re-parse every subject page, ignoring the stored page records.
+SCRAPER_FULL_REFRESH = os.environ.get("SCRAPER_FULL_REFRESH", "0") == "1"
+
+# Rows per write request when syncing the courses table, requests sent at a
+# time, and retries of a failed request (see utils/bulk.py).
+SYNC_BATCH_SIZE = int(os.environ.get("SYNC_BATCH_SIZE", "500"))
+SYNC_WORKERS = int(os.environ.get("SYNC_WORKERS", "4"))
+SYNC_RETRIES = int(os.environ.get("SYNC_RETRIES", "3"))
+# Columns compared when syncing (the section's identity and everything the web tier reads).
+SYNC_COLUMNS = ",".join(("semester",) + FIELDS + PARSED_COLUMNS)
+# Unique key of the courses table that upserts resolve on.
+COURSE_KEY = "semester,subject_code,section"
+# Parsed subject pages waiting for the database writer; a full queue pauses the fetches.
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "8"))
+
+# "full" scrapes and syncs every subject; "availability" only refreshes the seat
+# status of the subjects selected within RECENT_SELECTION_HOURS (see run_availability_refresh).
+SCRAPER_MODE = os.environ.get("SCRAPER_MODE", "full")
+RECENT_SELECTION_HOURS = float(os.environ.get("RECENT_SELECTION_HOURS", "24"))
+
+def clear_other_semesters(semester):
+    """
+    Delete the courses of every semester but the given one, which the web tier
+    no longer reads.
+    """
+    try:
+        supabase.table("courses").delete().neq("semester", semester).execute()
+    except Exception as e:
+        print("Error clearing other semesters:", e)
+
+def course_records(semester, data):
+    """courses table rows for a semester's course tuples."""
+    # Meeting times are parsed here, once per scrape, into day_mask/start_minute/end_minute.
+    return [{"semester": semester, **Section.from_row(course).as_record()} for course in data]
+
+def iter_semester_rows(semester, columns):
+    """Yield the given columns of a semester's rows in the courses table, read a page at a time."""
+    batch_size = 1000
+    offset = 0
+    while True:
+        result = supabase.table("courses")\
+                         .select(columns)\
+                         .eq("semester", semester)\
+                         .order("id")\
+                         .range(offset, offset + batch_size - 1)\
+                         .execute()
+        yield from result.data
+        if len(result.data) < batch_size:
+            return
+        offset += batch_size
+
+def fetch_semester_courses(semester):
+    """All of a semester's rows in the courses table, with their ids, paginated."""
+    return list(iter_semester_rows(semester, "id," + SYNC_COLUMNS))
+
+def count_semester_courses(semester):
+    """Number of the semester's rows in the courses table."""
+    result = supabase.table("courses")\
+                     .select("id", count="exact")\
+                     .eq("semester", semester)\
+                     .limit(1)\
+                     .execute()
+    return result.count
+
+def fetch_course_rows(semester, course_codes, columns):
+    """The given columns of the semester's rows of the given courses."""
+    batch_size = 1000
+    rows = []
+    # A bounded number of courses per query keeps the in.(...) filter's URL short.
+    for codes in bulk.chunks(sorted(course_codes), 100):
+        offset = 0
+        while True:
+            result = supabase.table("courses")\
+                             .select(columns)\
+                             .eq("semester", semester)\
+                             .in_("subject_code", codes)\
+                             .order("id")\
+                             .range(offset, offset + batch_size - 1)\
+                             .execute()
+            rows.extend(result.data)
+            if len(result.data) < batch_size:
+                break
+            offset += batch_size
+    return rows
+
+def fetch_subject_rows(semester, subject, columns):
+    """
+    The given columns (subject_code among them) of the semester's rows of a
+    subject page's courses, i.e. those whose scraper.subject_of() is subject,
+    whether or not any page record lists them.
+    """
+    # The page code's z and x stand for a space and a slash in the course codes;
+    # they match any one character here, and subject_of() picks the exact rows.
+    prefix = subject.replace("z", "_").replace("x", "_")
+    batch_size = 1000
+    offset = 0
+    rows = []
+    while True:
+        result = supabase.table("courses")\
+                         .select(columns)\
+                         .eq("semester", semester)\
+                         .like("subject_code", prefix + " %")\
+                         .order("id")\
+                         .range(offset, offset + batch_size - 1)\
+                         .execute()
+        rows.extend(result.data)
+        if len(result.data) < batch_size:
+            return [row for row in rows if scraper.subject_of(row["subject_code"]) == subject]
+        offset += batch_size
+
+def course_key(row):
+    """Identity of a section within a semester."""
+    return row["subject_code"], row["section"]
+
+def first_listings(courses):
+    """Course tuples without the repeated listings of a section (the first one counts)."""
+    seen = set()
+    first = []
+    for course in courses:
+        key = (course[0], course[3])
+        if key not in seen:
+            seen.add(key)
+            first.append(course)
+    return first
+
+class CourseSync:
+    """
+    Difference sync of a semester's rows in the courses table, fed page by
+    page as the scraper finishes subjects. Changed pages are compared in
+    batches of up to PIPELINE_QUEUE_SIZE pages: their sections are matched by
+    (semester, subject_code, section) to the table's current rows of the
+    batch's subjects (see fetch_subject_rows), read concurrently for that
+    batch only. New and changed sections are buffered for an upsert and the
+    rows of sections no longer listed for a delete. Whenever a round of chunks
+    is full the buffers are written in parallel chunks (see utils.bulk),
+    upserts before deletes so readers never see a subject empty or partial,
+    and then the page records of the written pages are saved, so a page whose
+    rows failed to write is parsed again next run. finish() also removes the
+    rows of subjects that were not scraped, found by a scan of the semester's
+    ids and course codes, and the page records of those that had one. Only the
+    first listing of a section is kept. Errors are raised, so the run is not
+    recorded as finished.
+    """
+
+    def __init__(self, semester, stored):
+        self.semester = semester
+        # Validators of the stored page records by subject (see load_subject_pages).
+        self.stored = stored
+        self.seen = set()
+        self.batch = []
+        self.pending = []
+        self.deletes = []
+        self.records = []
+        self.held = 0
+        self.changed = self.inserted = self.updated = self.deleted = self.duplicates = 0
+
+    def add(self, page):
+        """Queue a changed page; it is compared to the table with the rest of its batch."""
+        self.seen.add(page["subject"])
+        self.changed += 1
+        self.batch.append(page)
+        if len(self.batch) >= PIPELINE_QUEUE_SIZE:
+            self._compare()
+
+    def keep(self, page):
+        """Note an unchanged page, queueing its record if its validators changed."""
+        self.seen.add(page["subject"])
+        if page_state(page) == page_state(self.stored.get(page["subject"])):
+            return
+        if "courses" not in page:
+            page = dict(page, courses=load_page_courses(self.semester, [page["subject"]]).get(page["subject"], []))
+        self._hold([page])
+
+    def _compare(self):
+        pages, self.batch = self.batch, []
+        listed = [course for page in pages for course in page["courses"]]
+        courses = first_listings(listed)
+        self.duplicates += len(listed) - len(courses)
+        current = {}
+        with ThreadPoolExecutor(max_workers=len(pages)) as pool:
+            for rows in pool.map(lambda page: fetch_subject_rows(self.semester, page["subject"],
+                                                                 "id," + SYNC_COLUMNS), pages):
+                for row in rows:
+                    current.setdefault(course_key(row), []).append(row)
+        for record in course_records(self.semester, courses):
+            rows = current.pop(course_key(record), None)
+            if rows is None:
+                self.inserted += 1
+            else:
+                # Rows listed twice (older data) keep the first.
+                self.deletes.extend(row["id"] for row in rows[1:])
+                if all(rows[0].get(column) == value for column, value in record.items()):
+                    continue
+                self.updated += 1
+            self.pending.append(record)
+        self.deletes.extend(row["id"] for rows in current.values() for row in rows)
+        self._hold(pages)
+
+    def _hold(self, pages):
+        self.records.extend(pages)
+        self.held += sum(len(page["courses"]) for page in pages)
+        round_size = SYNC_BATCH_SIZE * SYNC_WORKERS
+        if len(self.pending) + len(self.deletes) >= round_size or self.held >= round_size:
+            self.flush()
+
+    def flush(self):
+        """Upsert the buffered sections, delete the buffered rows, then save the written pages' records."""
+        # returning="minimal": the written rows are not needed back.
+        bulk.write_chunks(self.pending,
+                          lambda chunk: supabase.table("courses")
+                                                .upsert(chunk, on_conflict=COURSE_KEY, returning="minimal").execute(),
+                          SYNC_BATCH_SIZE, SYNC_WORKERS, SYNC_RETRIES, label="courses upsert")
+        bulk.write_chunks(self.deletes,
+                          lambda chunk: supabase.table("courses")
+                                                .delete(returning="minimal").in_("id", chunk).execute(),
+                          SYNC_BATCH_SIZE, SYNC_WORKERS, SYNC_RETRIES, label="courses delete")
+        save_subject_pages(self.semester, self.records)
+        self.deleted += len(self.deletes)
+        self.pending, self.deletes, self.records, self.held = [], [], [], 0
+
+    def finish(self):
+        """
+        Compare the last batch, delete the rows of subjects not scraped this run
+        and write what is left; returns (inserted, updated, deleted).
+        """
+        if self.batch:
+            self._compare()
+        removed = sorted(set(self.stored) - self.seen)
+        if self.changed or removed:
+            for row in iter_semester_rows(self.semester, "id,subject_code"):
+                if scraper.subject_of(row["subject_code"]) not in self.seen:
+                    self.deletes.append(row["id"])
+        self.flush()
+        if removed:
+            delete_subject_pages(self.semester, removed)
+        if self.duplicates:
+            print(f"Ignored {self.duplicates} duplicate sections.")
+        if self.changed or removed:
+            print(f"Synced courses: {self.inserted} new, {self.updated} changed, {self.deleted} removed.")
+        return self.inserted, self.updated, self.deleted
+
+def load_subject_pages(semester):
+    """
+    Validators of the semester's stored page records by subject code (ETag,
+    Last-Modified and content hash; see scraper.fetch_subject), or {} if there
+    are none or they cannot be read. The records' parsed courses are only read
+    when an unchanged page's record is saved again (see load_page_courses).
     """
-    Unconditionally deletes all records from the courses table.
-    Uses a filter on the id column (assumed to be > 0 for all valid rows)
-    to satisfy Supabase's requirement for a WHERE clause.
+    try:
+        result = supabase.table("subject_pages")\
+                         .select("subject,etag,last_modified,content_hash")\
+                         .eq("semester", semester)\
+                         .execute()
+        return {row["subject"]: row for row in result.data}
+    except Exception as e:
+        print("Error loading subject pages:", e)
+        return {}
+
+def load_page_courses(semester, subjects):
+    """The course tuples stored with the given subjects' page records, by subject."""
+    if not subjects:
+        return {}
+    result = supabase.table("subject_pages")\
+                     .select("subject,courses")\
+                     .eq("semester", semester)\
+                     .in_("subject", subjects)\
+                     .execute()
+    return {row["subject"]: [tuple(course) for course in row["courses"] or []] for row in result.data}
+
+def page_state(page):
+    """What decides whether a subject page record needs saving."""
+    return (page["etag"], page["last_modified"], page["content_hash"]) if page else None
+
+def save_subject_pages(semester, pages):
+    """
+    Store the page records of this run for the next one's conditional requests.
+    Errors are raised, so a run whose records were not stored is not recorded.
+    """
+    if not pages:
+        return
+    rows = [{"semester": semester, "subject": page["subject"], "etag": page["etag"],
+             "last_modified": page["last_modified"], "content_hash": page["content_hash"],
+             "courses": [list(course) for course in page["courses"]]}
+            for page in pages]
+    supabase.table("subject_pages").upsert(rows, on_conflict="semester,subject").execute()
+
+def delete_subject_pages(semester, subjects):
+    """Delete the page records of subjects that are no longer scraped."""
+    supabase.table("subject_pages")\
+            .delete(returning="minimal")\
+            .eq("semester", semester)\
+            .in_("subject", subjects)\
+            .execute()
+
+def record_scrape_run(semester, row_count):
+    """
+    Record a finished scraper run (row_count is the sections listed, or those
+    updated by an availability refresh). The web tier uses the latest finish
+    time per semester as the catalog's data version to know when to reload its
+    cache. Returns the run's data version, or None if it could not be recorded.
     """
     try:
-        supabase.table("courses").delete().filter("id", "gt", 0).execute()
-        print("Courses table cleared.")
+        result = supabase.table("scrape_runs").insert({"semester": semester, "row_count": row_count}).execute()
+        return result.data[0]["finished_at"] if result.data else None
     except Exception as e:
-        print("Error clearing courses table:", e)
+        print("Error recording scrape run:", e)
+        return None
 
-def save_courses_to_supabase(semester, data):
+def publish_snapshot(semester, version, sections):
     """
-    Inserts or updates courses in Supabase via upsert.
-    (Ensure your courses table has a unique constraint on the columns that uniquely identify a course.)
+    Write the binary catalog snapshot (see utils.snapshot) of the sections with
+    seats available, the only ones the web tier uses, to CATALOG_SNAPSHOT_PATH
+    and/or upload it to CATALOG_SNAPSHOT_BUCKET, whichever are configured.
     """
+    if not (CATALOG_SNAPSHOT_PATH or CATALOG_SNAPSHOT_BUCKET):
+        return
     try:
-        formatted_data = [
-            {
-                "semester": semester,
-                "subject_code": course[0],
-                "course_name": course[1],
-                "units": course[2],
-                "section": course[3],
-                "section_type": course[4],
-                "days": course[5],
-                "time": course[6],
-                "location": course[7],
-                "professor": course[8],
-                "availability": course[9],
-                "notes": course[10],
-            }
-            for course in data
-        ]
-        supabase.table("courses").upsert(formatted_data).execute()
+        payload = snapshot.encode(semester, version,
+                                  [sec for sec in sections if sec.availability == "Seats Available"])
+        if CATALOG_SNAPSHOT_PATH:
+            snapshot.write(CATALOG_SNAPSHOT_PATH, payload)
+        if CATALOG_SNAPSHOT_BUCKET:
+            supabase.storage.from_(CATALOG_SNAPSHOT_BUCKET).upload(
+                f"{semester}.msgpack", payload,
+                {"content-type": "application/octet-stream", "upsert": "true"})
+        print(f"Published catalog snapshot ({len(payload)} bytes).")
     except Exception as e:
-        print("Error saving courses to supabase:", e)
+        print("Error publishing catalog snapshot:", e)
+
+def publish_table_snapshot(semester, version):
+    """publish_snapshot() of the semester's rows as they are now in the courses table, if configured."""
+    if CATALOG_SNAPSHOT_PATH or CATALOG_SNAPSHOT_BUCKET:
+        publish_snapshot(semester, version, [Section.from_record(row) for row in fetch_semester_courses(semester)])
+
+async def scrape_and_sync(semester, previous, stored):
+    """
+    Scrape the semester and sync the courses table as a pipeline: subject pages
+    are queued (bounded by PIPELINE_QUEUE_SIZE) as soon as they are fetched and
+    parsed, and synced by CourseSync in a worker thread while the remaining
+    pages download. previous holds the page validators the requests are
+    conditional on, stored those of the saved page records. Returns (changed
+    page count, rows written).
+    """
+    queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    producer = asyncio.create_task(scraper.stream_pages(semester, queue, previous))
+    sync = CourseSync(semester, stored)
+    try:
+        while (page := await queue.get()) is not None:
+            if page["changed"]:
+                await asyncio.to_thread(sync.add, page)
+            else:
+                await asyncio.to_thread(sync.keep, page)
+    except BaseException:
+        producer.cancel()
+        raise
+    await producer
+    written = sum(await asyncio.to_thread(sync.finish))
+    return sync.changed, written
 
 def run_scraper():
     """
     Scrapes the course data and stores it in Supabase.
-    Always clears the courses table before adding new data.
+    Subject pages that did not change since the last run (per their stored
+    ETag/Last-Modified and content hash) are not parsed again, and nothing is
+    written when no page changed. Otherwise only the sections that differ from
+    the table are inserted, updated or deleted (see CourseSync), starting while
+    the other pages are still being fetched (see scrape_and_sync).
     """
-    all_course_data = []
     try:
-        for subject_code in scraper.subject_codes:
-            data = scraper.courses(CURRENT_SEMESTER, subject_code)
-            all_course_data.extend(data)
-        clear_table()
-        save_courses_to_supabase(CURRENT_SEMESTER, all_course_data)
+        stored = load_subject_pages(CURRENT_SEMESTER)
+        previous = {} if SCRAPER_FULL_REFRESH else stored
+        changed, written = asyncio.run(scrape_and_sync(CURRENT_SEMESTER, previous, stored))
+        if changed:
+            print(f"{changed} subject pages changed.")
+            clear_other_semesters(CURRENT_SEMESTER)
+        else:
+            print("No subject pages changed since the last run.")
+        if not written:
+            # E.g. only the pages' markup changed; the sections are the same.
+            return
+        version = record_scrape_run(CURRENT_SEMESTER, count_semester_courses(CURRENT_SEMESTER))
+        publish_table_snapshot(CURRENT_SEMESTER, version)
     except Exception as e:
         print("Error running scraper:", e)
 
+def recent_subjects(semester, hours):
+    """
+    Subject page codes (in subject_codes order) of the courses selected in the
+    last hours, as recorded by the web tier in course_selections.
+    """
+    since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    batch_size = 1000
+    offset = 0
+    subjects = set()
+    while True:
+        result = supabase.table("course_selections")\
+                         .select("subject_code")\
+                         .eq("semester", semester)\
+                         .gt("selected_at", since)\
+                         .order("subject_code")\
+                         .range(offset, offset + batch_size - 1)\
+                         .execute()
+        subjects.update(scraper.subject_of(row["subject_code"]) for row in result.data)
+        if len(result.data) < batch_size:
+            return [code for code in scraper.subject_codes if code in subjects]
+        offset += batch_size
+
+def forget_subject_pages(semester, subjects):
+    """
+    Clear the stored validators and content hashes of the given subjects, so the
+    next full run parses their pages again instead of trusting rows it did not
+    write from them.
+    """
+    supabase.table("subject_pages")\
+            .update({"etag": None, "last_modified": None, "content_hash": None}, returning="minimal")\
+            .eq("semester", semester)\
+            .in_("subject", sorted(subjects))\
+            .execute()
+
+def update_availability(semester, statuses):
+    """
+    Set the availability column of the semester's rows whose seat status differs
+    from statuses, (course_code, section, availability) tuples as given by
+    scraper.parse_availability(); the first listing of a section counts. Rows are
+    updated in place by id, in chunks, one status at a time. Returns the number
+    of rows updated.
+    """
+    latest = {}
+    for course_code, section, availability in statuses:
+        latest.setdefault((course_code, section), availability)
+    changes = {}
+    subjects = set()
+    for row in fetch_course_rows(semester, {course_code for course_code, _ in latest},
+                                 "id,subject_code,section,availability"):
+        availability = latest.get(course_key(row))
+        if availability is not None and availability != row["availability"]:
+            changes.setdefault(availability, []).append(row["id"])
+            subjects.add(scraper.subject_of(row["subject_code"]))
+    if not changes:
+        return 0
+    # Before the rows change: the stored page records no longer match them.
+    forget_subject_pages(semester, subjects)
+    for availability, ids in changes.items():
+        bulk.write_chunks(ids,
+                          lambda chunk, availability=availability:
+                              supabase.table("courses")
+                                      .update({"availability": availability}, returning="minimal")
+                                      .in_("id", chunk).execute(),
+                          SYNC_BATCH_SIZE, SYNC_WORKERS, SYNC_RETRIES, label=f"availability {availability}")
+    return sum(len(ids) for ids in changes.values())
+
+def run_availability_refresh():
+    """
+    Refresh seat availability between full runs. Only the subject pages of the
+    courses selected within RECENT_SELECTION_HOURS are fetched, and only each
+    section's number and seat status is read from them (scraper.parse_availability);
+    the availability column of the rows that changed is then updated in place.
+    Sections not in the table yet are left to the next full run. When anything
+    changed, a run is recorded so the web tier reloads its catalog, and the
+    catalog snapshot is published again.
+    """
+    try:
+        subjects = recent_subjects(CURRENT_SEMESTER, RECENT_SELECTION_HOURS)
+        if not subjects:
+            print("No recently selected subjects to refresh.")
+            return
+        pages = asyncio.run(scraper.scrape_pages(CURRENT_SEMESTER, None, subjects,
+                                                 parse=scraper.parse_availability))
+        updated = update_availability(CURRENT_SEMESTER, [status for page in pages for status in page["courses"]])
+        print(f"Refreshed the availability of {len(subjects)} subjects: {updated} sections changed.")
+        if not updated:
+            return
+        version = record_scrape_run(CURRENT_SEMESTER, updated)
+        publish_table_snapshot(CURRENT_SEMESTER, version)
+    except Exception as e:
+        print("Error refreshing availability:", e)
+
 if __name__ == "__main__":
-    run_scraper()
+    if SCRAPER_MODE == "availability":
+        run_availability_refresh()
+    else:
+        run_scraper()
@@ -0,0 +1,91 @@
+"""
+Benchmark: writing a semester of course rows through the real Supabase client
+against the local PostgREST stand-in (benchmarks/postgrest_stub.py), as one
+request versus chunked, parallel upserts (utils/bulk.py). The stand-in adds
+latency per request and a write cost per row, and can fail a share of the
+chunked requests to exercise the retries:
+    python benchmarks/bench_bulk_upsert.py [rows] [chunk_size] [workers] [latency_ms] [row_cost_us] [fail_rate]
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+
+# Ensure the parent directory is in the path so we can import the utils package.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from supabase import create_client
+from utils import bulk
+from utils.section import Section
+
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "postgrest_stub.py")
+
+COURSE_KEY = "semester,subject_code,section"
+
+def synthetic_records(rows, semester="Bench_2026"):
+    """courses table rows shaped like the scheduled update's."""
+    records = []
+    for i in range(rows):
+        course = Section(f"BENCH {100 + i // 20}", "Benchmark Course", "3 Units", f"{i % 20 + 1:02d}", "LECTURE",
+                         "Monday Wednesday", "10:00AM-11:15AM", "ROOM 1", f"Prof {i % 7}", "Seats Available", "")
+        records.append({"semester": semester, **course.as_record()})
+    return records
+
+def start_stub(latency_ms, row_cost_us, fail_rate):
+    """Run the stand-in in its own process (so it does not share this one's GIL); returns (process, URL)."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen([sys.executable, STUB, "--port", str(port), "--latency-ms", str(latency_ms),
+                                "--row-cost-us", str(row_cost_us), "--fail-rate", str(fail_rate)],
+                               stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return process, f"http://127.0.0.1:{port}"
+
+def run(label, records, chunk_size, workers, latency_ms, row_cost_us, fail_rate):
+    process, url = start_stub(latency_ms, row_cost_us, fail_rate)
+    client = create_client(url, "local.stub.key")
+    start = time.perf_counter()
+    try:
+        bulk.write_chunks(records,
+                          lambda chunk: client.table("courses")
+                                              .upsert(chunk, on_conflict=COURSE_KEY, returning="minimal").execute(),
+                          chunk_size, workers, retries=5, backoff=0.05, label=label)
+        status = "ok"
+    except RuntimeError as e:
+        status = f"failed: {e}"
+    elapsed = time.perf_counter() - start
+    stored = len(client.table("courses").select("id").execute().data)
+    process.terminate()
+    process.wait()
+    return elapsed, stored, status
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    latency_ms = float(sys.argv[4]) if len(sys.argv) > 4 else 20
+    row_cost_us = float(sys.argv[5]) if len(sys.argv) > 5 else 50
+    fail_rate = float(sys.argv[6]) if len(sys.argv) > 6 else 0
+    records = synthetic_records(rows)
+
+    results = []
+    for label, size, threads, failures in [("single request", rows, 1, 0),
+                                           ("chunked", chunk_size, 1, fail_rate),
+                                           ("chunked parallel", chunk_size, workers, fail_rate)]:
+        elapsed, stored, status = run(label, records, size, threads, latency_ms, row_cost_us, failures)
+        results.append((label, size, threads, elapsed, stored, status))
+
+    print(f"\n{rows} rows, {latency_ms:g} ms per request + {row_cost_us:g} us per row, "
+          f"{fail_rate:.0%} of chunked requests failing")
+    for label, size, threads, elapsed, stored, status in results:
+        print(f"{label:18s} chunk={size:<6d} workers={threads:<2d} {elapsed:7.2f}s  "
+              f"{rows / elapsed:8.0f} rows/s  stored={stored}  {status}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: schedule validation with the NumPy conflict matrix versus the
+pairwise time_test path that generate() originally used.
+
+Runs on a synthetic, deterministic set of sections so it needs no database:
+    python benchmarks/bench_conflict_matrix.py [num_courses] [sections_per_type]
+"""
+import os
+import sys
+import time
+import random
+import itertools
+
+import numpy as np
+
+# Ensure the parent directory is in the path so we can import the utils package.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils import conflict_matrix, solver, time_test
+from utils.section import Section
+
+DAY_PATTERNS = ["Monday Wednesday", "Tuesday Thursday", "Monday Wednesday Friday", "Friday", "Tuesday", "Saturday"]
+
+def format_minutes(minutes):
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1:02d}:{minute:02d}{'AM' if hour < 12 else 'PM'}"
+
+def synthetic_sections(num_courses, sections_per_type, seed=0):
+    """Build Section records like the ones load_catalog() holds."""
+    rng = random.Random(seed)
+    sections = []
+    for c in range(num_courses):
+        code = f"BENCH {100 + c}"
+        types = ["LECTURE", "LAB"] if c % 2 else ["LECTURE"]
+        for section_type in types:
+            for s in range(sections_per_type):
+                start = rng.randrange(8 * 60, 20 * 60, 30)
+                end = start + rng.choice([50, 75, 110, 165])
+                sections.append(Section(code, "Benchmark", "3", f"{c:02d}{s:02d}", section_type,
+                                        rng.choice(DAY_PATTERNS), f"{format_minutes(start)}-{format_minutes(end)}",
+                                        "ROOM", f"Prof {s}", "Seats Available", ""))
+    return sections
+
+def slots_for(sections):
+    """Group section indices into one slot per (course, section type)."""
+    slots = {}
+    for i, sec in enumerate(sections):
+        slots.setdefault((sec.subject_code, sec.section_type), []).append(i)
+    return [slots[key] for key in sorted(slots)]
+
+def pairwise_time_test(sections, slots):
+    """The original generate() validation: full product, then every pair via time_test."""
+    valid = 0
+    for combo in itertools.product(*slots):
+        schedule = [sections[i] for i in combo]
+        conflict = False
+        for i in range(len(schedule)):
+            for j in range(i + 1, len(schedule)):
+                if time_test.are_time_windows_in_conflict(schedule[i].days, schedule[i].time,
+                                                          schedule[j].days, schedule[j].time):
+                    conflict = True
+                    break
+            if conflict:
+                break
+        if not conflict:
+            valid += 1
+    return valid
+
+def validate_batch(matrix, combos):
+    """
+    Check a batch of combinations against the conflict matrix.
+    combos is an integer array of shape (batch, k) holding section indices;
+    returns a boolean array of length batch that is True for conflict-free rows.
+    """
+    ok = np.ones(len(combos), dtype=bool)
+    k = combos.shape[1] if combos.ndim == 2 else 0
+    for i in range(k):
+        for j in range(i + 1, k):
+            ok &= ~matrix[combos[:, i], combos[:, j]]
+    return ok
+
+def iter_valid_combinations(slot_indices, matrix, batch_size=4096):
+    """
+    Yield conflict-free combinations as tuples of section indices.
+    slot_indices has one list of candidate section indices per slot (one slot per
+    course and section type); combinations are drawn from their product in
+    itertools.product order and validated batch_size at a time.
+    """
+    if not slot_indices:
+        return
+    product = itertools.product(*slot_indices)
+    while True:
+        batch = list(itertools.islice(product, batch_size))
+        if not batch:
+            return
+        combos = np.array(batch, dtype=np.intp)
+        for row in combos[validate_batch(matrix, combos)]:
+            yield tuple(row.tolist())
+
+def matrix_batches(sections, slots):
+    matrix = conflict_matrix.build_conflict_matrix(sections)
+    return sum(1 for _ in iter_valid_combinations(slots, matrix))
+
+def backtracking(sections, slots):
+    options = [[(sections[i],) for i in slot] for slot in slots]
+    return sum(1 for _ in solver.iter_valid_schedules(options))
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed * 1000:10.1f} ms   valid={result}")
+    return result
+
+if __name__ == "__main__":
+    num_courses = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    per_type = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    sections = synthetic_sections(num_courses, per_type)
+    slots = slots_for(sections)
+    total = 1
+    for slot in slots:
+        total *= len(slot)
+    print(f"{len(sections)} sections, {len(slots)} slots, {total} combinations")
+    results = {
+        timed("time_test pairwise", pairwise_time_test, sections, slots),
+        timed("conflict matrix", matrix_batches, sections, slots),
+        timed("backtracking solver", backtracking, sections, slots),
+    }
+    if len(results) != 1:
+        sys.exit("Validation paths disagree on the number of valid schedules")
@@ -0,0 +1,45 @@
+"""
+Benchmark: subject page parse time with the original BeautifulSoup html.parser
+path versus the lxml parser.
+
+Parses the saved pages in benchmarks/fixtures (or the given HTML files or
+directories) repeat times with each parser:
+    python benchmarks/bench_parser.py [repeat] [path ...]
+"""
+import os
+import sys
+import time
+
+# Ensure the parent directory is in the path so we can import the scraper package.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scraper import scraper
+from check_parser_parity import FIXTURES, html_files, read_page
+
+def timed(parse, pages, repeat):
+    """Best-of-three time to parse every page repeat times, and the sections found."""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            found = sum(len(parse(html)) for html in pages)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, found
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    files = html_files(sys.argv[2:] or [FIXTURES])
+    pages = [read_page(path) for path in files]
+    size = sum(len(html) for html in pages)
+    print(f"{len(pages)} pages, {size / 1024:.0f} KiB, parsed {repeat} times")
+
+    results = {}
+    for name, parse in scraper.PARSERS.items():
+        elapsed, found = timed(parse, pages, repeat)
+        results[name] = elapsed
+        per_page = elapsed / (repeat * len(pages)) * 1000
+        print(f"{name:12s} {elapsed:8.3f}s  {per_page:7.3f} ms/page  {found} sections")
+    print(f"speedup: {results['html.parser'] / results['lxml']:.1f}x")
+
+if __name__ == "__main__":
+    main()
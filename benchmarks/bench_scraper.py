@@ -0,0 +1,143 @@
+"""
+Benchmark: the scraper against the offline corpus (benchmarks/corpus.py), with
+each parser, reporting pages/s, rows/s, peak memory and whether the results
+match the corpus's expected.json:
+    courses          the sequential loop over scraper.courses()
+    async            scraper.courses_async() (SCRAPER_CONCURRENCY at a time)
+    refresh          the scheduled update's full run into an empty courses table,
+                     against the local PostgREST stand-in (benchmarks/postgrest_stub.py)
+    refresh (again)  the same run once more, with every page unchanged
+    availability     the availability refresh (SCRAPER_MODE=availability) with every
+                     subject selected and a tenth of the rows' seat status stale
+Each measurement runs in its own process, so peak memory is per mode:
+    python benchmarks/corpus.py generate      # once, or capture with network access
+    python benchmarks/bench_scraper.py [latency_ms] [concurrency] [db_latency_ms]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Ensure the parent directory is in the path so we can import the scraper package.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import corpus
+from bench_bulk_upsert import start_stub
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def expected_keys(expected):
+    return {(course[0], course[3]) for rows in expected.values() for course in rows}
+
+def expected_statuses(expected):
+    statuses = {}
+    for rows in expected.values():
+        for course in rows:
+            statuses.setdefault((course[0], course[3]), course[9])
+    return statuses
+
+def make_stale(su, semester, expected):
+    """Select every course and give every tenth row a wrong seat status, for the availability refresh."""
+    now = su.datetime.now(su.timezone.utc).isoformat()
+    su.supabase.table("course_selections").upsert(
+        [{"semester": semester, "subject_code": code, "selected_at": now}
+         for code in {course[0] for rows in expected.values() for course in rows}],
+        on_conflict="semester,subject_code", returning="minimal").execute()
+    for row in su.fetch_semester_courses(semester)[::10]:
+        stale = "No Seats Available" if row["availability"] == "Seats Available" else "Seats Available"
+        su.supabase.table("courses").update({"availability": stale}, returning="minimal").eq("id", row["id"]).execute()
+
+def measure(mode):
+    """Run one mode in this process (configured by the parent's environment) and print its result as JSON."""
+    import asyncio
+    from scraper import scraper
+    semester, expected = corpus.load_expected()
+    codes = list(expected)
+    if mode in ("refresh", "availability"):
+        from api import scheduled_update as su
+        su.CURRENT_SEMESTER = semester
+        scraper.subject_codes = codes
+    if mode == "availability":
+        make_stale(su, semester, expected)
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == "courses":
+        rows = [course for code in codes for course in scraper.courses(semester, code)]
+    elif mode == "async":
+        rows = asyncio.run(scraper.courses_async(semester, codes))
+    elif mode == "refresh":
+        su.run_scraper()
+    else:
+        su.run_availability_refresh()
+    elapsed = time.perf_counter() - start
+
+    if mode == "refresh":
+        stored = {su.course_key(row) for row in su.fetch_semester_courses(semester)}
+        correct = stored == expected_keys(expected)
+        row_count = len(stored)
+    elif mode == "availability":
+        stored = {su.course_key(row): row["availability"] for row in su.fetch_semester_courses(semester)}
+        correct = stored == expected_statuses(expected)
+        row_count = len(stored)
+    else:
+        correct = rows == [course for code in codes for course in expected[code]]
+        row_count = len(rows)
+    print("RESULT " + json.dumps({"pages": len(codes), "rows": row_count, "seconds": elapsed,
+                                  "baseline_mb": baseline, "peak_mb": peak_rss_mb(), "correct": correct}))
+
+def run(mode, env):
+    """Measure mode in a child process; returns its result."""
+    child = subprocess.run([sys.executable, __file__, "--measure", mode], env=env,
+                           capture_output=True, text=True)
+    for line in child.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    sys.exit(f"{mode} failed:\n{child.stdout}{child.stderr}")
+
+def main():
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 0
+    concurrency = sys.argv[2] if len(sys.argv) > 2 else "16"
+    db_latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    if not os.path.exists(os.path.join(corpus.CORPUS_DIR, "expected.json")):
+        sys.exit("No corpus; run python benchmarks/corpus.py generate (or capture) first.")
+    semester, expected = corpus.load_expected()
+    url = corpus.start(latency_ms=latency_ms)
+    base_env = dict(os.environ, SCHEDULE_BASE_URL=url, SCRAPER_CONCURRENCY=concurrency,
+                    SUPABASE_URL="http://127.0.0.1:9", SUPABASE_SERVICE_ROLE_KEY="local.stub.key",
+                    CATALOG_SNAPSHOT_PATH="", CATALOG_SNAPSHOT_BUCKET="", SCRAPER_FULL_REFRESH="0")
+
+    results = []
+    for parser in corpus.scraper.PARSERS:
+        env = dict(base_env, SCRAPER_PARSER=parser)
+        for mode in ("courses", "async"):
+            results.append((mode, parser, run(mode, env)))
+        process, stub_url = start_stub(db_latency_ms, 0, 0)
+        try:
+            env["SUPABASE_URL"] = stub_url
+            results.append(("refresh", parser, run("refresh", env)))
+            results.append(("refresh (again)", parser, run("refresh", env)))
+            results.append(("availability", parser, run("availability", env)))
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"\n{semester}: {len(expected)} subjects, {sum(map(len, expected.values()))} sections; "
+          f"{latency_ms:g} ms per page, concurrency {concurrency}, {db_latency_ms:g} ms per database request")
+    print(f"{'mode':16s} {'parser':12s} {'seconds':>8s} {'pages/s':>8s} {'rows/s':>9s} "
+          f"{'peak MB':>8s} {'+MB':>6s}  correct")
+    for mode, parser, r in results:
+        print(f"{mode:16s} {parser:12s} {r['seconds']:8.2f} {r['pages'] / r['seconds']:8.1f} "
+              f"{r['rows'] / r['seconds']:9.0f} {r['peak_mb']:8.1f} {r['peak_mb'] - r['baseline_mb']:6.1f}  "
+              f"{'yes' if r['correct'] else 'NO'}")
+    if not all(r["correct"] for _, _, r in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--measure":
+        measure(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,62 @@
+"""
+Parity check: the lxml subject page parser must produce exactly the same course
+tuples as the original BeautifulSoup html.parser one, and both availability
+parsers the (course_code, section, availability) of those tuples.
+
+Runs over the saved subject pages in benchmarks/fixtures (or the given HTML
+files or directories) and exits non-zero on any difference:
+    python benchmarks/check_parser_parity.py [path ...]
+"""
+import os
+import sys
+import glob
+
+# Ensure the parent directory is in the path so we can import the scraper package.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scraper import scraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def html_files(paths):
+    """The .html files named by paths, expanding directories."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.html"))))
+        else:
+            files.append(path)
+    return files
+
+def read_page(path):
+    """A saved page as text, with its line endings kept as served."""
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+def main():
+    files = html_files(sys.argv[1:] or [FIXTURES])
+    mismatches = 0
+    for path in files:
+        html = read_page(path)
+        expected = scraper.parse_courses_soup(html)
+        actual = scraper.parse_courses_lxml(html)
+        statuses = [(course[0], course[3], course[9]) for course in expected]
+        availability = {name: parse(html) for name, parse in scraper.AVAILABILITY_PARSERS.items()}
+        wrong = [name for name, got in availability.items() if got != statuses]
+        if actual == expected and not wrong:
+            print(f"ok        {os.path.basename(path)}: {len(expected)} sections")
+            continue
+        mismatches += 1
+        if wrong:
+            print(f"MISMATCH  {os.path.basename(path)}: availability differs ({', '.join(wrong)})")
+        if actual == expected:
+            continue
+        print(f"MISMATCH  {os.path.basename(path)}: {len(expected)} sections (html.parser), {len(actual)} (lxml)")
+        for i, (want, got) in enumerate(zip(expected, actual)):
+            if want != got:
+                print(f"  first difference at {i}:\n    html.parser {want}\n    lxml        {got}")
+                break
+    print(f"{len(files) - mismatches}/{len(files)} pages identical")
+    return 1 if mismatches or not files else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Offline scraper corpus.
+
+Subject pages saved in the class schedule site's layout
+(benchmarks/corpus/<semester>/By_Subject/<code>.html), together with the course
+tuples the reference parser (BeautifulSoup html.parser) gave for them in
+expected.json, and a local HTTP stand-in that serves them. Scraper changes can
+then be measured (benchmarks/bench_scraper.py) and checked without reaching
+web.csulb.edu:
+    python benchmarks/corpus.py capture [semester]         # save REPRESENTATIVE_SUBJECTS from the live site
+    python benchmarks/corpus.py generate [semester] [scale] # or build a synthetic corpus in the same markup
+    python benchmarks/corpus.py check                      # compare every parser's output to expected.json
+    python benchmarks/corpus.py serve [port] [latency_ms]  # serve it; point SCHEDULE_BASE_URL at it
+
+capture needs network access. generate builds deterministic pages in the live
+markup (see benchmarks/fixtures) where it is not available; the corpus in the
+repository was generated this way. Either way, expected.json is written from the
+pages as saved, so check flags any later parser change that alters the results.
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+from aiohttp import web
+
+# Ensure the parent directory is in the path so we can import the scraper package.
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scraper import scraper
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+DEFAULT_SEMESTER = "Spring_2026"
+
+# Large and small departments, lab- and activity-heavy ones, and codes with the
+# site's escaped characters (z for a space, x for a slash).
+REPRESENTATIVE_SUBJECTS = ["ACCT", "ART", "BIOL", "CECS", "CHEM", "CHzE", "COMM", "ENGL",
+                           "HIST", "KIN", "MATH", "MUS", "PSY", "SPAN", "AxST", "UHP"]
+
+def subject_dir(root, semester):
+    return os.path.join(root, semester, "By_Subject")
+
+def page_path(root, semester, code):
+    return os.path.join(subject_dir(root, semester), f"{code}.html")
+
+def read_page(path):
+    """A saved page as text, with its line endings kept as served."""
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+def load_expected(root=CORPUS_DIR):
+    """(semester, {subject code: expected course tuples}) of a corpus, in subject order."""
+    with open(os.path.join(root, "expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    courses = {code: [tuple(course) for course in rows] for code, rows in expected["subjects"].items()}
+    return expected["semester"], courses
+
+def load(root=CORPUS_DIR):
+    """(semester, {subject code: page text}, {subject code: expected course tuples}) of a corpus."""
+    semester, courses = load_expected(root)
+    pages = {code: read_page(page_path(root, semester, code)) for code in courses}
+    return semester, pages, courses
+
+def save_expected(root, semester, codes):
+    """Record the reference parser's results for the saved pages."""
+    subjects = {code: scraper.parse_courses_soup(read_page(page_path(root, semester, code))) for code in codes}
+    with open(os.path.join(root, "expected.json"), "w", encoding="utf-8") as f:
+        json.dump({"semester": semester, "subjects": subjects}, f, indent=0)
+    print(f"{sum(len(rows) for rows in subjects.values())} expected sections in {len(subjects)} subjects")
+
+def capture(semester, codes=REPRESENTATIVE_SUBJECTS, root=CORPUS_DIR):
+    """Download the subjects' pages from the live site (SCHEDULE_BASE_URL) as served."""
+    os.makedirs(subject_dir(root, semester), exist_ok=True)
+    saved = []
+    for code in codes:
+        response = requests.get(scraper.subject_url(semester, code), timeout=30)
+        if response.status_code != 200:
+            print(f"{code}: HTTP {response.status_code}, skipped")
+            continue
+        with open(page_path(root, semester, code), "wb") as f:
+            f.write(response.content)
+        saved.append(code)
+        print(f"{code}: {len(response.content)} bytes")
+    save_expected(root, semester, saved)
+
+# Synthetic pages, in the markup of the live site.
+
+HEADER_ROW = ("<tr>" + "".join(f'<th scope="col">{name}</th>' for name in (
+    "SEC.", "CLASS #", "NO MATERIAL COST", "RESERVE CAP", "CLASS NOTES", "DAYS", "TIME",
+    "OPEN SEATS", "LOCATION", "INSTRUCTOR", "COMMENT")) + "</tr>")
+SEAT_IMAGES = ['<img src="../../images/dot_green.gif" alt="Seats available" title="Seats available" />',
+               '<img src="../../images/dot_yellow.gif" alt="Reserve Capacity" title="Reserve Capacity" />', ""]
+DAYS = ["MW", "TuTh", "MWF", "F", "M", "W", "Tu", "Th", "Sa", "MTuWTh", "NA"]
+TIMES = ["8-9:15AM", "9:30-10:45AM", "11-12:15PM", "12:30-1:45PM", "2-3:15PM", "3:30-4:45PM",
+         "5-6:15PM", "7-9:45PM", "10-10:50AM", "1-3:45PM", "12-12:50PM"]
+NOTES = ["LEC", "LEC", "LAB", "SEM", "ACT", "SUP", "", "LAB<br/>Online-No meet times"]
+COMMENTS = ["", "", "", "Reserved for majors", "Hybrid: some meetings online", "Instructor consent required"]
+
+def synthetic_page(semester, code, rng, scale=1.0):
+    display = code.replace("z", " ").replace("x", "/")
+    term = semester.replace("_", " ")
+    out = ['<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" '
+           '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+           '<html xmlns="http://www.w3.org/1999/xhtml" lang="en">\n<head>\n'
+           '<meta http-equiv="Content-Type" content="text/html; charset=utf-8" />\n'
+           f'<title>{display} - Class Schedule - {term} - CSULB</title>\n'
+           '<link rel="stylesheet" type="text/css" href="../../css/schedule.css" />\n</head>\n<body>\n'
+           f'<div id="header"><a href="../../index.html">Class Schedule</a> &raquo; {term} &raquo; {display}</div>\n'
+           f'<div class="session"><h2>{term} Regular Session</h2></div>\n']
+    number = 100
+    for _ in range(max(1, int(rng.randint(5, 45) * scale))):
+        number += rng.randint(1, 12)
+        out.append(f'<div class="courseBlock">\n<div class="courseHeader"><h4>'
+                   f'<span class="courseCode">{display} {number}</span>\n'
+                   f'<span class="courseTitle">{display} TOPICS &amp; METHODS {number}</span>\n'
+                   f'<span class="units">{rng.choice(["1 Unit", "3 Units", "4 Units"])}</span></h4></div>\n')
+        section = 0
+        for _ in range(rng.choice([1, 1, 1, 2, 3])):
+            out.append('<div class="groupSection">\n<table class="sectionTable" summary="sections" cellspacing="0">\n'
+                       + HEADER_ROW + "\n")
+            for _ in range(rng.randint(1, 6)):
+                section += 1
+                days = rng.choice(DAYS)
+                time_text = "NA" if days == "NA" else rng.choice(TIMES)
+                cells = [f"{section:02d}", str(rng.randint(1000, 9999)), "&nbsp;", "", rng.choice(NOTES), days,
+                         time_text, rng.choice(SEAT_IMAGES), "ONLINE-ONLY" if days == "NA" else
+                         f"{rng.choice(['VEC', 'ECS', 'LA5', 'HC', 'PSY', 'UMC'])}-{rng.randint(100, 450)}",
+                         rng.choice(["Staff", f"Instructor {rng.randint(1, 40)}"]), rng.choice(COMMENTS)]
+                out.append("<tr>\n" + "".join(f"<td>{cell}</td>\n" for cell in cells) + "</tr>\n")
+            out.append("</table></div>\n")
+        out.append("</div>\n")
+    out.append('<div id="footer"><p>&copy; California State University, Long Beach</p></div>\n</body>\n</html>\n')
+    return "".join(out)
+
+def generate(semester, codes=REPRESENTATIVE_SUBJECTS, scale=1.0, root=CORPUS_DIR, seed=0):
+    """Write a deterministic synthetic corpus (scale multiplies the number of courses per subject)."""
+    os.makedirs(subject_dir(root, semester), exist_ok=True)
+    for code in codes:
+        rng = random.Random(f"{seed}:{code}")
+        with open(page_path(root, semester, code), "w", encoding="utf-8", newline="") as f:
+            f.write(synthetic_page(semester, code, rng, scale))
+    save_expected(root, semester, codes)
+
+def check(root=CORPUS_DIR):
+    """Compare every parser's results on the corpus to expected.json; returns the number of mismatches."""
+    semester, pages, expected = load(root)
+    mismatches = 0
+    for name, parse in scraper.PARSERS.items():
+        wrong = [code for code, html in pages.items() if parse(html) != expected[code]]
+        mismatches += len(wrong)
+        print(f"{name:12s} {len(pages) - len(wrong)}/{len(pages)} subjects match"
+              + (f"; different: {', '.join(wrong)}" if wrong else ""))
+    for name, parse in scraper.AVAILABILITY_PARSERS.items():
+        wrong = [code for code, html in pages.items()
+                 if parse(html) != [(course[0], course[3], course[9]) for course in expected[code]]]
+        mismatches += len(wrong)
+        print(f"{name:12s} {len(pages) - len(wrong)}/{len(pages)} subjects' availability match"
+              + (f"; different: {', '.join(wrong)}" if wrong else ""))
+    return mismatches
+
+def start(root=CORPUS_DIR, port=0, latency_ms=0):
+    """
+    Serve root over HTTP from a background thread, with ETag/Last-Modified and
+    optional latency per request. Returns the base URL for SCHEDULE_BASE_URL.
+    """
+    ready = threading.Event()
+    address = {}
+
+    @web.middleware
+    async def delay(request, handler):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        return await handler(request)
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application(middlewares=[delay])
+        app.router.add_static("/", root)
+        runner = web.AppRunner(app, access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+        address["port"] = runner.addresses[0][1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{address['port']}"
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "capture":
+        capture(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SEMESTER)
+    elif command == "generate":
+        generate(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SEMESTER,
+                 scale=float(sys.argv[3]) if len(sys.argv) > 3 else 1.0)
+    elif command == "check":
+        sys.exit(1 if check() else 0)
+    elif command == "serve":
+        url = start(port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000,
+                    latency_ms=float(sys.argv[3]) if len(sys.argv) > 3 else 0)
+        print(f"Serving {CORPUS_DIR} on {url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    else:
+        sys.exit(__doc__)
+
+if __name__ == "__main__":
+    main()
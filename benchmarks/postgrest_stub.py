@@ -0,0 +1,250 @@
+"""
+Local PostgREST stand-in for testing the scheduled update's database writes.
+
+Serves the subset of the PostgREST API that api/scheduled_update.py uses
+(select with eq/neq/in/gt/like filters, order, offset, limit and exact counts;
+insert; upsert with on_conflict; update; delete) from in-memory tables.
+Optional per-request latency, a per-row write cost, a request size limit and
+randomly failing writes model a remote database and exercise the bulk
+writer's chunking and retries:
+    python benchmarks/postgrest_stub.py [--port 54321] [--latency-ms 0] [--row-cost-us 0]
+                                        [--max-rows 0] [--fail-rate 0]
+
+Point the Supabase client at it with SUPABASE_URL=http://127.0.0.1:54321 and
+any JWT-shaped key, e.g. SUPABASE_SERVICE_ROLE_KEY=local.stub.key.
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Unique keys besides id (see supabase/migrations/).
+UNIQUE_KEYS = {
+    "courses": ("semester", "subject_code", "section"),
+    "subject_pages": ("semester", "subject"),
+}
+RESERVED_PARAMS = {"select", "order", "offset", "limit", "columns", "on_conflict"}
+
+def split_list(value):
+    """Items of a PostgREST in.(...) list, honouring double-quoted items."""
+    items, current, quoted = [], "", False
+    for char in value:
+        if char == '"':
+            quoted = not quoted
+        elif char == "," and not quoted:
+            items.append(current)
+            current = ""
+        else:
+            current += char
+    items.append(current)
+    return items
+
+def greater(actual, value):
+    if actual is None:
+        return False
+    try:
+        return float(actual) > float(value)
+    except ValueError:
+        # Timestamps, stored as the ISO strings the client sent.
+        return str(actual) > value
+
+def compile_filters(params):
+    """A row predicate for a request's column filters, parsed once per request."""
+    tests = []
+    for column, condition in params.items():
+        if column in RESERVED_PARAMS:
+            continue
+        op, _, value = condition.partition(".")
+        if op == "eq":
+            tests.append(lambda row, column=column, value=value: str(row.get(column)) == value)
+        elif op == "neq":
+            tests.append(lambda row, column=column, value=value: str(row.get(column)) != value)
+        elif op == "in":
+            tests.append(lambda row, column=column, values=set(split_list(value[1:-1])):
+                         str(row.get(column)) in values)
+        elif op == "like":
+            # PostgREST accepts * as well as % for any run of characters.
+            pattern = re.compile("".join(".*" if char in "%*" else "." if char == "_" else re.escape(char)
+                                         for char in value), re.DOTALL)
+            tests.append(lambda row, column=column, pattern=pattern:
+                         row.get(column) is not None and pattern.fullmatch(str(row.get(column))) is not None)
+        elif op == "gt":
+            tests.append(lambda row, column=column, value=value: greater(row.get(column), value))
+        else:
+            raise ValueError(f"unsupported filter {condition}")
+    return lambda row: all(test(row) for test in tests)
+
+class Store:
+    """In-memory tables, guarded by one lock."""
+
+    def __init__(self):
+        self.tables = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def select(self, table, params):
+        """The matching rows of a page, and the number of matching rows in all."""
+        match = compile_filters(params)
+        with self.lock:
+            rows = [dict(row) for row in self.tables.get(table, []) if match(row)]
+        for order in reversed(params.get("order", "").split(",") if params.get("order") else []):
+            column, _, direction = order.partition(".")
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction == "desc")
+        total = len(rows)
+        offset = int(params.get("offset", 0))
+        limit = params.get("limit")
+        rows = rows[offset:offset + int(limit) if limit is not None else None]
+        select = params.get("select", "*")
+        if select != "*":
+            columns = select.split(",")
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return rows, total
+
+    def write(self, table, payload, params, upsert):
+        rows = payload if isinstance(payload, list) else [payload]
+        key = tuple(params["on_conflict"].split(",")) if params.get("on_conflict") else UNIQUE_KEYS.get(table)
+        written = []
+        with self.lock:
+            stored = self.tables.setdefault(table, [])
+            by_id = {old["id"]: old for old in stored}
+            by_key = {tuple(old.get(c) for c in key): old for old in stored} if key else {}
+            for row in rows:
+                existing = by_id.get(row.get("id"))
+                if existing is None and key:
+                    existing = by_key.get(tuple(row.get(c) for c in key))
+                if existing is not None:
+                    if not upsert:
+                        raise KeyError(f"duplicate key value violates unique constraint on {table}")
+                    existing.update(row)
+                    written.append(dict(existing))
+                    continue
+                new = {"id": next(self.ids), **row}
+                if table == "scrape_runs":
+                    new.setdefault("finished_at", datetime.now(timezone.utc).isoformat())
+                stored.append(new)
+                by_id[new["id"]] = new
+                if key:
+                    by_key[tuple(new.get(c) for c in key)] = new
+                written.append(dict(new))
+        return written
+
+    def update(self, table, payload, params):
+        match = compile_filters(params)
+        with self.lock:
+            updated = [row for row in self.tables.get(table, []) if match(row)]
+            for row in updated:
+                row.update(payload)
+            return [dict(row) for row in updated]
+
+    def delete(self, table, params):
+        match = compile_filters(params)
+        with self.lock:
+            stored = self.tables.get(table, [])
+            gone = [row for row in stored if match(row)]
+            self.tables[table] = [row for row in stored if not match(row)]
+        return gone
+
+def make_handler(store, latency=0.0, row_cost=0.0, max_rows=0, fail_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        def _table_and_params(self):
+            url = urlsplit(self.path)
+            prefix = "/rest/v1/"
+            if not url.path.startswith(prefix):
+                return None, {}
+            return url.path[len(prefix):], dict(parse_qsl(url.query, keep_blank_values=True))
+
+        def _reply(self, status, body, content_range=None):
+            if status < 300 and "return=minimal" in self.headers.get("Prefer", ""):
+                status, body = (201 if self.command == "POST" else 204), None
+            data = json.dumps(body).encode("utf-8") if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            if content_range:
+                self.send_header("Content-Range", content_range)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _handle(self, method):
+            if latency:
+                time.sleep(latency)
+            table, params = self._table_and_params()
+            if table is None:
+                return self._reply(404, {"message": "not found"})
+            if method != "GET" and random.random() < fail_rate:
+                return self._reply(503, {"message": "injected failure"})
+            try:
+                if method == "GET":
+                    rows, total = store.select(table, params)
+                    content_range = None
+                    if "count=exact" in self.headers.get("Prefer", ""):
+                        offset = int(params.get("offset", 0))
+                        shown = f"{offset}-{offset + len(rows) - 1}" if rows else "*"
+                        content_range = f"{shown}/{total}"
+                    return self._reply(200, rows, content_range)
+                if method == "DELETE":
+                    return self._reply(200, store.delete(table, params))
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"[]")
+                if method == "PATCH":
+                    return self._reply(200, store.update(table, payload, params))
+                rows = len(payload) if isinstance(payload, list) else 1
+                if max_rows and rows > max_rows:
+                    return self._reply(413, {"message": f"payload of {rows} rows is too large"})
+                time.sleep(rows * row_cost)
+                upsert = "resolution=merge-duplicates" in self.headers.get("Prefer", "")
+                return self._reply(201, store.write(table, payload, params, upsert))
+            except KeyError as e:
+                return self._reply(409, {"code": "23505", "message": str(e)})
+            except ValueError as e:
+                return self._reply(400, {"message": str(e)})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_PATCH(self):
+            self._handle("PATCH")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def start(port=0, latency_ms=0, row_cost_us=0, max_rows=0, fail_rate=0.0):
+    """Serve a fresh Store in a background thread; returns (base URL, store, server)."""
+    store = Store()
+    handler = make_handler(store, latency_ms / 1000, row_cost_us / 1e6, max_rows, fail_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}", store, server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--row-cost-us", type=float, default=0)
+    parser.add_argument("--max-rows", type=int, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    args = parser.parse_args()
+    url, _, server = start(args.port, args.latency_ms, args.row_cost_us, args.max_rows, args.fail_rate)
+    print(f"PostgREST stand-in on {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
+import asyncio
+import email.utils
+import hashlib
+from datetime import datetime, timezone
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import os
 
 # Define all subject codes in a global list so we can re-use it in /scrape_courses.
@@ -14,137 +21,437 @@ subject_codes = ['ACCT', 'AFRS', 'ASLD', 'AIS', 'AMST', 'ANTH', "ARAB", "ART", "
                      "PHYS", "POSC", "PSY", "PPA", "REC", "RxST", "RGR", "RUSS", "SCED", "SzW", "SOC", "SPAN", "SLP",
                      "STAT", "SDHE", "SRL", "SxI", "SCM", "THEA", "TRST", "UNIV", "UHP", "UDCP", "VIET", "WGSS"]
 
-def courses(semester, subject_code):
-    # Define the URL of the web page you want to scrape
-    url = f'http://web.csulb.edu/depts/enrollment/registration/class_schedule/{semester}/By_Subject/{subject_code}.html'
+# Class schedule site; overridable to scrape a mirror or a local copy.
+SCHEDULE_BASE_URL = os.environ.get(
+    "SCHEDULE_BASE_URL", "http://web.csulb.edu/depts/enrollment/registration/class_schedule")
+
+# Async scraping: simultaneous requests, per-request timeout (seconds) and retries.
+SCRAPER_CONCURRENCY = int(os.environ.get("SCRAPER_CONCURRENCY", "16"))
+SCRAPER_TIMEOUT = float(os.environ.get("SCRAPER_TIMEOUT", "20"))
+SCRAPER_RETRIES = int(os.environ.get("SCRAPER_RETRIES", "3"))
+# Responses retried besides 5xx (request timeout, rate limiting), and the longest
+# Retry-After wait (seconds) honoured before a retry.
+RETRY_STATUSES = {408, 429}
+MAX_RETRY_AFTER = 60
+# HTML parser for subject pages: "lxml" (fast) or "html.parser" (BeautifulSoup, the original).
+SCRAPER_PARSER = os.environ.get("SCRAPER_PARSER", "lxml")
+
+def subject_url(semester, subject_code):
+    """URL of a subject's class schedule page."""
+    return f'{SCHEDULE_BASE_URL}/{semester}/By_Subject/{subject_code}.html'
+
+def section_tuple(course_code, course_title, units, columns, seats_available):
+    """
+    Build a section's course tuple from the stripped texts of its row's cells,
+    or return None for rows without a section number. Shared by both parsers.
+    """
+    section_number = columns[0]  # Extract section number
+    class_notes = columns[4]  # Extract CLASS NOTES
+    if not section_number:
+        return None
+
+    # Check if "SEM" or "LAB" is present in the CLASS NOTES column
+    if "SEM" in class_notes:
+        course_type = "SEMINAR"
+    elif "LAB" in class_notes:
+        course_type = "LAB"
+    elif "LEC" in class_notes:
+        course_type = "LECTURE"
+    elif "ACT" in class_notes:
+        course_type = "ACTIVITY"
+    elif "SUP" in class_notes:
+        course_type = "SUPPLEMENTAL"
+    else:
+        course_type = ""
+
+    # Extract other information
+    days = columns[5]
+    day = " ".join([
+        "Monday" if "M" in days else "",
+        "Tuesday" if "Tu" in days else "",
+        "Wednesday" if "W" in days else "",
+        "Thursday" if "Th" in days else "",
+        "Friday" if "F" in days else "",
+        "Saturday" if "Sa" in days else "",
+        "Sunday" if "Su" in days else "",
+    ]).strip()
+
+    # Update the code that processes time data
+    time = columns[6]  # Extract time
+    time_parts = time.split('-')
+
+    if len(time_parts) == 2:
+        start_time, end_time = time_parts[0].strip(), time_parts[1].strip()
+
+        # Process and format the start time
+        start_time_parts = start_time.split(':')
+        if len(start_time_parts) == 1:
+            start_time = f"{start_time}:00"
+        elif len(start_time_parts) == 2:
+            start_time = f"{start_time_parts[0].zfill(2)}:{start_time_parts[1].zfill(2)}"
+
+        # Process and format the end time
+        end_time_parts = end_time.split(':')
+        if len(end_time_parts) == 1:
+            end_time = f"{end_time}:00"
+        elif len(end_time_parts) == 2:
+            end_time = f"{end_time_parts[0].zfill(2)}:{end_time_parts[1].zfill(2)}"
+
+        e_time = end_time.replace('AM', '').replace('PM', '')
+
+        # Adding AM/PM in start_time format based on class time context
+        if "AM" in end_time:
+            start_time += "AM"
+        elif "PM" in end_time:
+            start_hours, _ = map(int, start_time.split(':'))
+            end_hours, _ = map(int, e_time.split(':'))
+            if end_hours == 12 and start_hours < 12:
+                start_time += "AM"
+            elif start_hours > end_hours:
+                start_time += "AM" if start_hours != 12 else "PM"
+            elif (end_hours - start_hours) <= 5:
+                start_time += "PM"
+
+        # Combine start and end times with a hyphen to represent the range
+        time = f"{start_time}-{end_time}"
+
+    location = columns[8]
+    instructor = columns[9]
+    comment = columns[10] if len(columns) > 10 else ""
+
+    return (course_code, course_title, units, section_number, course_type, day, time, location,
+            instructor, seats_available, comment)
+
+def parse_courses_soup(html):
+    """parse_courses() with BeautifulSoup's pure-Python html.parser (the original parser)."""
+    # Parse the HTML content of the page using BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Find all course blocks
+    course_blocks = soup.find_all('div', class_='courseBlock')
+
+    course_data = []
+
+    for course_block in course_blocks:
+        # Extract course code and title from the course block
+        course_header = course_block.find('div', class_='courseHeader')
+        if course_header:
+            course_code = course_header.find('span', class_='courseCode').text.strip()
+            course_title = course_header.find('span', class_='courseTitle').text.strip()
+            units = course_header.find('span', class_='units').text.strip() if course_header.find('span', 'units') else ''
+
+        # Find the table containing section information
+        group_sections = course_block.find_all('table', class_='sectionTable')
+        if course_code and course_title and group_sections:
+            # Iterate over each row in the table (excluding the header row)
+            for group_section in group_sections:
+                for row in group_section.find_all('tr')[1:]:
+                    green_dot_img = row.find('img', alt='Seats available', title='Seats available')
+                    yellow_dot_img = row.find('img', alt='Reserve Capacity', title='Reserve Capacity')
+                    seats_available = "Seats Available" if green_dot_img else "Reserve Capacity" if yellow_dot_img else "No Seats Available"
+
+                    # Extract data from each column in the row
+                    columns = [column.text.strip() for column in row.find_all('td')]
+                    course = section_tuple(course_code, course_title, units, columns, seats_available)
+                    if course:
+                        course_data.append(course)
+
+    return course_data
+
+# Text of an element and its descendants, as plain str (no back-reference to the tree).
+_element_text = etree.XPath("string()", smart_strings=False)
+_html_parser = lxml.html.HTMLParser(encoding='utf-8')
+
+def _has_class(element, name):
+    return name in (element.get('class') or '').split()
+
+def _find(element, tag, name):
+    """First descendant of element with the given tag and class, like BeautifulSoup's find()."""
+    for child in element.iterdescendants(tag):
+        if _has_class(child, name):
+            return child
+    return None
+
+def _seat_status(row):
+    status = "No Seats Available"
+    for img in row.iterdescendants('img'):
+        alt = img.get('alt')
+        if alt == 'Seats available' and img.get('title') == alt:
+            return "Seats Available"
+        if alt == 'Reserve Capacity' and img.get('title') == alt:
+            status = "Reserve Capacity"
+    return status
+
+def parse_courses_lxml(html):
+    """
+    parse_courses() with lxml's C parser, walking the tree directly instead of
+    through BeautifulSoup's find/find_all. Gives the same tuples as
+    parse_courses_soup() (see benchmarks/check_parser_parity.py).
+    """
+    if not html.strip():
+        return []
+    root = lxml.html.document_fromstring(html.encode('utf-8'), parser=_html_parser)
 
-    # Send an HTTP GET request to the URL
-    response = requests.get(url)
+    course_data = []
+    course_code = course_title = units = None
+    for course_block in root.iter('div'):
+        if not _has_class(course_block, 'courseBlock'):
+            continue
+        course_header = _find(course_block, 'div', 'courseHeader')
+        if course_header is not None:
+            course_code = _element_text(_find(course_header, 'span', 'courseCode')).strip()
+            course_title = _element_text(_find(course_header, 'span', 'courseTitle')).strip()
+            units_span = _find(course_header, 'span', 'units')
+            units = _element_text(units_span).strip() if units_span is not None else ''
+
+        group_sections = [table for table in course_block.iterdescendants('table')
+                          if _has_class(table, 'sectionTable')]
+        if course_code and course_title and group_sections:
+            for group_section in group_sections:
+                for row in list(group_section.iterdescendants('tr'))[1:]:
+                    seats_available = _seat_status(row)
+                    columns = [_element_text(column).strip() for column in row.iterdescendants('td')]
+                    course = section_tuple(course_code, course_title, units, columns, seats_available)
+                    if course:
+                        course_data.append(course)
+
+    return course_data
+
+def parse_availability_soup(html):
+    """parse_availability() with BeautifulSoup's html.parser."""
+    soup = BeautifulSoup(html, 'html.parser')
+    statuses = []
+    course_code = None
+    for course_block in soup.find_all('div', class_='courseBlock'):
+        course_header = course_block.find('div', class_='courseHeader')
+        if course_header:
+            course_code = course_header.find('span', class_='courseCode').text.strip()
+        if not course_code:
+            continue
+        for group_section in course_block.find_all('table', class_='sectionTable'):
+            for row in group_section.find_all('tr')[1:]:
+                cell = row.find('td')
+                section_number = cell.text.strip() if cell else ''
+                if not section_number:
+                    continue
+                green_dot_img = row.find('img', alt='Seats available', title='Seats available')
+                yellow_dot_img = row.find('img', alt='Reserve Capacity', title='Reserve Capacity')
+                seats_available = "Seats Available" if green_dot_img else "Reserve Capacity" if yellow_dot_img else "No Seats Available"
+                statuses.append((course_code, section_number, seats_available))
+    return statuses
+
+def parse_availability_lxml(html):
+    """parse_availability() with lxml, reading only each row's first cell and seat image."""
+    if not html.strip():
+        return []
+    root = lxml.html.document_fromstring(html.encode('utf-8'), parser=_html_parser)
+    statuses = []
+    course_code = None
+    for course_block in root.iter('div'):
+        if not _has_class(course_block, 'courseBlock'):
+            continue
+        course_header = _find(course_block, 'div', 'courseHeader')
+        if course_header is not None:
+            course_code = _element_text(_find(course_header, 'span', 'courseCode')).strip()
+        if not course_code:
+            continue
+        for group_section in course_block.iterdescendants('table'):
+            if not _has_class(group_section, 'sectionTable'):
+                continue
+            for row in list(group_section.iterdescendants('tr'))[1:]:
+                cell = next(row.iterdescendants('td'), None)
+                section_number = _element_text(cell).strip() if cell is not None else ''
+                if section_number:
+                    statuses.append((course_code, section_number, _seat_status(row)))
+    return statuses
+
+PARSERS = {"lxml": parse_courses_lxml, "html.parser": parse_courses_soup}
+AVAILABILITY_PARSERS = {"lxml": parse_availability_lxml, "html.parser": parse_availability_soup}
+
+def parse_courses(html):
+    """
+    Parse a subject's class schedule page into course tuples
+    (course_code, title, units, section, type, days, time, location, instructor,
+    availability, comment) of every section, whatever its seat status ("Seats
+    Available", "Reserve Capacity" or "No Seats Available"; the web tier only
+    schedules open sections). Uses the parser named by SCRAPER_PARSER.
+    """
+    return PARSERS[SCRAPER_PARSER](html)
+
+def parse_availability(html):
+    """
+    (course_code, section, availability) of every section on a subject's page:
+    the part of parse_courses() the availability refresh needs, without
+    building the full course tuples. Uses the parser named by SCRAPER_PARSER.
+    """
+    return AVAILABILITY_PARSERS[SCRAPER_PARSER](html)
+
+def subject_of(course_code):
+    """Subject page code of a course code, e.g. "CH E 200" -> "CHzE" (z for a space, x for a slash)."""
+    return course_code.rsplit(" ", 1)[0].replace(" ", "z").replace("/", "x")
+
+def courses(semester, subject_code):
+    # Send an HTTP GET request to the subject's page
+    response = requests.get(subject_url(semester, subject_code))
 
     # Check if the request was successful (status code 200)
     if response.status_code == 200:
-        # Parse the HTML content of the page using BeautifulSoup
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Find all course blocks
-        course_blocks = soup.find_all('div', class_='courseBlock')
-
-        course_data = []
-
-        for course_block in course_blocks:
-            # Extract course code and title from the course block
-            course_header = course_block.find('div', class_='courseHeader')
-            if course_header:
-                course_code = course_header.find('span', class_='courseCode').text.strip()
-                course_title = course_header.find('span', class_='courseTitle').text.strip()
-                units = course_header.find('span', class_='units').text.strip() if course_header.find('span', 'units') else ''
-
-            # Find the table containing section information
-            group_sections = course_block.find_all('table', class_='sectionTable')
-            if course_code and course_title and group_sections:
-                # Iterate over each row in the table (excluding the header row)
-                for group_section in group_sections:
-                    for row in group_section.find_all('tr')[1:]:
-                        # Extract data from each column in the row
-                        columns = row.find_all('td')
-                        section_number = columns[0].text.strip()  # Extract section number
-                        class_notes = columns[4].text.strip()  # Extract CLASS NOTES
-                        if not section_number:
-                            continue
-
-                        # Check if "SEM" or "LAB" is present in the CLASS NOTES column
-                        if "SEM" in class_notes:
-                            course_type = "SEMINAR"
-                        elif "LAB" in class_notes:
-                            course_type = "LAB"
-                        elif "LEC" in class_notes:
-                            course_type = "LECTURE"
-                        elif "ACT" in class_notes:
-                            course_type = "ACTIVITY"
-                        elif "SUP" in class_notes:
-                            course_type = "SUPPLEMENTAL"
-                        else:
-                            course_type = ""
-
-                        # Extract other information
-                        days = columns[5].text.strip()
-                        day = " ".join([
-                            "Monday" if "M" in days else "",
-                            "Tuesday" if "Tu" in days else "",
-                            "Wednesday" if "W" in days else "",
-                            "Thursday" if "Th" in days else "",
-                            "Friday" if "F" in days else "",
-                            "Saturday" if "Sa" in days else "",
-                            "Sunday" if "Su" in days else "",
-                        ]).strip()
-
-                        # Update the code that processes time data
-                        time = columns[6].text.strip()  # Extract time
-                        time_parts = time.split('-')
-
-                        if len(time_parts) == 2:
-                            start_time, end_time = time_parts[0].strip(), time_parts[1].strip()
-
-                            # Process and format the start time
-                            start_time_parts = start_time.split(':')
-                            if len(start_time_parts) == 1:
-                                start_time = f"{start_time}:00"
-                            elif len(start_time_parts) == 2:
-                                start_time = f"{start_time_parts[0].zfill(2)}:{start_time_parts[1].zfill(2)}"
-
-                            # Process and format the end time
-                            end_time_parts = end_time.split(':')
-                            if len(end_time_parts) == 1:
-                                end_time = f"{end_time}:00"
-                            elif len(end_time_parts) == 2:
-                                end_time = f"{end_time_parts[0].zfill(2)}:{end_time_parts[1].zfill(2)}"
-
-                            e_time = end_time.replace('AM', '').replace('PM', '')
-
-                            # Adding AM/PM in start_time format based on class time context
-                            if "AM" in end_time:
-                                start_time += "AM"
-                            elif "PM" in end_time:
-                                start_hours, _ = map(int, start_time.split(':'))
-                                end_hours, _ = map(int, e_time.split(':'))
-                                if end_hours == 12 and start_hours < 12:
-                                    start_time += "AM"
-                                elif start_hours > end_hours:
-                                    start_time += "AM" if start_hours != 12 else "PM"
-                                elif (end_hours - start_hours) <= 5:
-                                    start_time += "PM"
-
-                            # Combine start and end times with a hyphen to represent the range
-                            time = f"{start_time}-{end_time}"
-
-                        location = columns[8].text.strip()
-                        instructor = columns[9].text.strip()
-                        comment = columns[10].text.strip() if len(columns) > 10 else ""
-
-                        green_dot_img = row.find('img', alt='Seats available', title='Seats available')
-                        yellow_dot_img = row.find('img', alt='Reserve Capacity', title='Reserve Capacity')
-                        seats_available = "Seats Available" if green_dot_img else "Reserve Capacity" if yellow_dot_img else "No Seats Available"
-
-                        if seats_available == "Seats Available":
-                            course_data.append(
-                                (course_code, course_title, units, section_number, course_type, day, time, location,
-                                 instructor, seats_available, comment))
-
-        return course_data
+        return parse_courses(response.text)
     else:
         return []
 
+def retry_after_seconds(value):
+    """Seconds a Retry-After header (delay in seconds or an HTTP date) asks to wait, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+def content_hash(body):
+    """Hash of a subject page's raw content, to tell changed pages from re-served ones."""
+    return hashlib.sha256(body).hexdigest()
+
+async def fetch_subject(session, semaphore, semester, subject_code, retries=SCRAPER_RETRIES, previous=None,
+                        parse=None):
+    """
+    Fetch and parse one subject page on a shared aiohttp session, at most
+    semaphore's limit at a time. Connection errors, timeouts, 408, 429 and 5xx
+    responses are retried with exponential backoff, waiting at least as long as
+    a Retry-After header asks. Only a 404 (a subject not offered this semester)
+    gives no courses; any other response raises at once, and the retries raise
+    once used up, so a run never stores a partial catalog or deletes a subject's
+    sections because of a refused request.
+
+    previous is the page record of the last run (see below), if any: the request
+    is then conditional on its ETag/Last-Modified, and a page that is not
+    modified, or whose content hashes the same, is not parsed again.
+
+    Returns the page record: {"subject", "etag", "last_modified",
+    "content_hash", "courses"} plus "changed", False when the courses are the
+    previous record's. "courses" is what parse (parse_courses by default) gives
+    for the page; an unchanged page's record has the previous record's courses,
+    and none if previous only holds the validators.
+    """
+    parse = parse or parse_courses
+    url = subject_url(semester, subject_code)
+    headers = {}
+    if previous:
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and previous:
+                        return dict(previous, changed=False)
+                    if response.status == 200:
+                        body = await response.read()
+                        page = {"subject": subject_code, "etag": response.headers.get("ETag"),
+                                "last_modified": response.headers.get("Last-Modified"),
+                                "content_hash": content_hash(body)}
+                        if previous and previous.get("content_hash") == page["content_hash"]:
+                            return dict(previous, **page, changed=False)
+                        html = body.decode(response.get_encoding(), errors="replace")
+                        return dict(page, courses=parse(html), changed=True)
+                    if response.status == 404:
+                        page = {"subject": subject_code, "etag": None, "last_modified": None,
+                                "content_hash": None, "courses": []}
+                        changed = previous is None or previous.get("content_hash") is not None
+                        return dict(page, changed=changed)
+                    error = f"HTTP {response.status}"
+                    if response.status < 500 and response.status not in RETRY_STATUSES:
+                        raise RuntimeError(f"Fetching {subject_code} failed: {error}")
+                    retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = repr(e)
+            retry_after = None
+        if attempt == retries:
+            raise RuntimeError(f"Fetching {subject_code} failed after {retries + 1} attempts: {error}")
+        delay = 0.5 * 2 ** attempt
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, MAX_RETRY_AFTER))
+        print(f"Retrying {subject_code} in {delay:.1f}s ({error})")
+        await asyncio.sleep(delay)
+
+async def scrape_pages(semester, previous=None, codes=None, concurrency=SCRAPER_CONCURRENCY,
+                       timeout=SCRAPER_TIMEOUT, retries=SCRAPER_RETRIES, parse=None):
+    """
+    Scrape the given subjects (all subject_codes by default) concurrently over
+    one pooled connection set. previous maps subject codes to the page records
+    of the last run. Returns the page records (see fetch_subject, which parse is
+    passed to) in subject order.
+    """
+    codes = subject_codes if codes is None else codes
+    previous = previous or {}
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        return await asyncio.gather(
+            *(fetch_subject(session, semaphore, semester, code, retries, previous.get(code), parse) for code in codes))
+
+async def stream_pages(semester, queue, previous=None, codes=None, concurrency=SCRAPER_CONCURRENCY,
+                       timeout=SCRAPER_TIMEOUT, retries=SCRAPER_RETRIES):
+    """
+    Scrape like scrape_pages(), but put each page record on queue (an
+    asyncio.Queue, normally bounded) as soon as its subject is done, in
+    completion order, so a consumer can store it while the other pages are
+    still being fetched. A subject holds its fetch slot until its record is
+    queued, so a full queue holds back the fetches and at most concurrency +
+    queue.maxsize pages are in memory at once. None is queued at the end, also
+    when a fetch fails; the failure is then raised.
+    """
+    codes = subject_codes if codes is None else codes
+    previous = previous or {}
+    slots = asyncio.Semaphore(concurrency)
+    requests_in_flight = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def fetch_and_queue(session, code):
+        async with slots:
+            page = await fetch_subject(session, requests_in_flight, semester, code, retries, previous.get(code))
+            await queue.put(page)
+
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+            tasks = [asyncio.create_task(fetch_and_queue(session, code)) for code in codes]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+    finally:
+        await queue.put(None)
+
+async def courses_async(semester, codes=None, concurrency=SCRAPER_CONCURRENCY,
+                        timeout=SCRAPER_TIMEOUT, retries=SCRAPER_RETRIES):
+    """
+    Scrape the given subjects unconditionally. Returns the course tuples in
+    subject order, the same list the sequential loop over courses() builds.
+    """
+    pages = await scrape_pages(semester, None, codes, concurrency, timeout, retries)
+    return [course for page in pages for course in page["courses"]]
+
 
 def fetch_and_store_courses(semester):
     """
     Collects data from all subject_codes, returns a big list of course tuples.
     This function is now only used if no cache is found.
     """
-    all_course_data = []
-    for subject_code in subject_codes:
-        data = courses(semester, subject_code)
-        all_course_data.extend(data)
-    return all_course_data
+    return asyncio.run(courses_async(semester))
 
 
 def filter_courses(course_data, selected_courses):
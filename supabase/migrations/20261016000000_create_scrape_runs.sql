@@ -0,0 +1,11 @@
+-- One row per finished scraper run. The web tier reads the latest finished_at
+-- for its semester as the catalog data version and reloads its cache when it changes.
+create table if not exists public.scrape_runs (
+    id bigint generated always as identity primary key,
+    semester text not null,
+    row_count integer not null default 0,
+    finished_at timestamptz not null default now()
+);
+
+create index if not exists scrape_runs_semester_finished_at_idx
+    on public.scrape_runs (semester, finished_at desc);
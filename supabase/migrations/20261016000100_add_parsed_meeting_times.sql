@@ -0,0 +1,7 @@
+-- Meeting times parsed once at ingestion, so the web tier does not re-parse the
+-- display strings: weekday bitmask (Sunday = bit 0) and start/end minutes since
+-- midnight. start_minute/end_minute are null for sections without meeting times.
+alter table public.courses
+    add column if not exists day_mask smallint,
+    add column if not exists start_minute smallint,
+    add column if not exists end_minute smallint;
@@ -0,0 +1,12 @@
+-- Per-subject page state of the last scraper run: the HTTP validators used for
+-- conditional requests, a hash of the page content and the courses parsed from
+-- it, so unchanged pages are neither parsed nor written again.
+create table if not exists public.subject_pages (
+    semester text not null,
+    subject text not null,
+    etag text,
+    last_modified text,
+    content_hash text,
+    courses jsonb not null default '[]'::jsonb,
+    primary key (semester, subject)
+);
@@ -0,0 +1,12 @@
+-- The scraper syncs the courses table by difference, keyed on
+-- (semester, subject_code, section). Drop duplicate rows left by the old
+-- clear-and-reinsert runs, then enforce the key.
+delete from public.courses a
+    using public.courses b
+    where a.id > b.id
+      and a.semester = b.semester
+      and a.subject_code = b.subject_code
+      and a.section = b.section;
+
+create unique index if not exists courses_semester_subject_code_section_key
+    on public.courses (semester, subject_code, section);
@@ -0,0 +1,13 @@
+-- Courses users recently generated schedules for (one row per course, stamped
+-- with the last selection). The scheduled update's availability refresh
+-- (SCRAPER_MODE=availability) re-fetches the subject pages of the courses
+-- selected within RECENT_SELECTION_HOURS.
+create table if not exists public.course_selections (
+    semester text not null,
+    subject_code text not null,
+    selected_at timestamptz not null default now(),
+    primary key (semester, subject_code)
+);
+
+create index if not exists course_selections_semester_selected_at_idx
+    on public.course_selections (semester, selected_at desc);
@@ -0,0 +1,67 @@
+"""
+Time and result budgets for schedule generation.
+
+A Budget travels with one generation request through the solver. The search
+calls tick() for every option it places and accept() for every valid schedule;
+once the deadline passes or max_results schedules have been accepted the search
+stops and the budget is marked truncated, so the caller can return the partial
+results instead of holding the worker indefinitely. Progress counters are
+published through an optional callback at most every progress_interval seconds.
+"""
+import time
+
+class Budget:
+    # How many placements happen between two clock checks.
+    CHECK_EVERY = 256
+
+    def __init__(self, seconds=None, max_results=None, on_progress=None, progress_interval=0.5):
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds if seconds is not None else None
+        self.max_results = max_results
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.explored = 0
+        self.found = 0
+        self.truncated = False
+        # Solver cursor (option indices) at which a stopped search can resume.
+        self.cursor = None
+        self._next_report = self.started
+
+    def remaining(self):
+        """Seconds left before the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def tick(self):
+        """Record one placement; returns False once the deadline has passed."""
+        self.explored += 1
+        if self.explored % self.CHECK_EVERY:
+            return not self.truncated
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            self.truncated = True
+        if self.on_progress is not None and now >= self._next_report:
+            self._next_report = now + self.progress_interval
+            self.report()
+        return not self.truncated
+
+    def accept(self):
+        """Record one valid schedule; returns False if the result cap is already reached."""
+        if self.truncated or (self.max_results is not None and self.found >= self.max_results):
+            self.truncated = True
+            return False
+        self.found += 1
+        return True
+
+    def report(self, done=False):
+        """Publish the current counters through on_progress."""
+        if self.on_progress is None:
+            return
+        self.on_progress({
+            "explored": self.explored,
+            "found": self.found,
+            "elapsed": round(time.monotonic() - self.started, 1),
+            "truncated": self.truncated,
+            "done": done,
+        })
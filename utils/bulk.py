@@ -0,0 +1,72 @@
+"""
+Chunked, parallel bulk writes.
+
+Sending a whole semester as one request risks the API's request-size limits,
+and one transient failure used to lose the entire refresh. write_chunks() splits
+the rows into chunks, sends up to workers of them at a time from a thread pool
+(the Supabase client is synchronous and the work is network-bound), retries a
+failed chunk with exponential backoff and prints each chunk's throughput.
+Writes must be idempotent (upserts on a unique key, deletes by id), since a
+chunk whose response was lost may have been applied before it is retried.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Chunk reports come from worker threads; print them whole.
+_print_lock = threading.Lock()
+
+def report(message):
+    with _print_lock:
+        print(message)
+
+def chunks(items, size):
+    """items split into lists of at most size items."""
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def write_chunk(write, chunk, number, total, label, retries, backoff):
+    """Write one chunk, retrying on failure; returns the seconds the successful attempt took."""
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            write(chunk)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * 2 ** attempt
+            report(f"{label} chunk {number}/{total} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        elapsed = time.perf_counter() - start
+        rate = len(chunk) / elapsed if elapsed > 0 else float("inf")
+        report(f"{label} chunk {number}/{total}: {len(chunk)} rows in {elapsed:.2f}s ({rate:.0f} rows/s)"
+               + (f" after {attempt} retries" if attempt else ""))
+        return elapsed
+
+def write_chunks(items, write, chunk_size=500, workers=4, retries=3, backoff=0.5, label="rows"):
+    """
+    Call write(chunk) for every chunk of chunk_size items, up to workers chunks
+    at a time, retrying each failed chunk up to retries times. Returns the number
+    of items written. If a chunk still fails, the remaining chunks are finished
+    and a RuntimeError naming the failed chunks is raised.
+    """
+    parts = chunks(items, chunk_size)
+    if not parts:
+        return 0
+    start = time.perf_counter()
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(parts)))) as pool:
+        futures = [pool.submit(write_chunk, write, chunk, number, len(parts), label, retries, backoff)
+                   for number, chunk in enumerate(parts, 1)]
+        for number, future in enumerate(futures, 1):
+            try:
+                future.result()
+            except Exception as e:
+                failed.append(f"{number} ({e})")
+    if failed:
+        raise RuntimeError(f"{label}: {len(failed)} of {len(parts)} chunks failed: {', '.join(failed)}")
+    elapsed = time.perf_counter() - start
+    rate = len(items) / elapsed if elapsed > 0 else float("inf")
+    print(f"{label}: {len(items)} rows in {len(parts)} chunks, {elapsed:.2f}s ({rate:.0f} rows/s)")
+    return len(items)
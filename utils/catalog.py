@@ -0,0 +1,158 @@
+"""
+Process-wide semester catalog cache.
+
+Loading the catalog pages through the whole courses table, so it is kept in
+process memory per semester and reused across requests. An entry is reloaded
+when it is older than the TTL, or when the data version (the finish time of the
+last scraper run, a one-row query checked at most every check_interval seconds)
+changes. A copy of the rows is also kept in the shared cache (Redis) under the
+data version, so other instances and cold starts can skip the table scan.
+"""
+import json
+import threading
+import time
+
+from utils.section import Section
+
+# Class notes that mark an online section without meeting times.
+ONLINE_NOTES = ("online-no meet times", "no-meet times", "online no meet times")
+
+def is_online_only(sec):
+    """True for an open online section that has no meeting times."""
+    notes = sec.notes.strip().lower()
+    return (sec.availability == "Seats Available" and not sec.has_meeting_time
+            and any(marker in notes for marker in ONLINE_NOTES))
+
+class Catalog:
+    """
+    One semester's sections plus the data version they were loaded at, and the
+    lookup indexes the pages need, built once per load from the sections with
+    seats available (the scraper also stores full and reserved ones):
+      courses                sorted (subject_code, course_name) pairs
+      professors             sorted professor names
+      professors_by_course   subject_code -> set of professor names
+      inperson               subject_code -> section_type -> open sections with meeting times
+      online                 subject_code -> open online sections without meeting times
+    Dicts keep the catalog order of the courses.
+    """
+
+    def __init__(self, semester, version, sections):
+        self.semester = semester
+        self.version = version
+        self.sections = sections
+        self.loaded_at = time.monotonic()
+        self.checked_at = self.loaded_at
+
+        names = set()
+        self.professors_by_course = {}
+        self.inperson = {}
+        self.online = {}
+        for sec in sections:
+            if sec.availability != "Seats Available":
+                continue
+            code = sec.subject_code
+            names.add((code, sec.course_name))
+            professors = self.professors_by_course.setdefault(code, set())
+            if sec.professor.strip():
+                professors.add(sec.professor.strip())
+            if is_online_only(sec):
+                if not sec.section_type.strip():
+                    sec = sec.replace(section_type="Online")
+                self.online.setdefault(code, []).append(sec)
+            elif sec.has_meeting_time:
+                self.inperson.setdefault(code, {}).setdefault(sec.section_type, []).append(sec)
+        self.courses = sorted(names)
+        self.professors = sorted(set().union(*self.professors_by_course.values()))
+
+    def professors_for(self, subject_codes):
+        """Sorted professors teaching any of the given courses."""
+        return sorted(set().union(*(self.professors_by_course.get(code, ()) for code in subject_codes)))
+
+_catalogs = {}
+_versions = {}
+_lock = threading.Lock()
+
+def shared_key(semester, version):
+    """Shared-cache key of a semester's rows at a data version."""
+    return f"catalog:{semester}:{version or 'latest'}"
+
+def load_shared(cache, semester, version):
+    """Sections from the shared cache, or None if missing or unreadable."""
+    if cache is None:
+        return None
+    try:
+        cached = cache.get(shared_key(semester, version))
+        if not cached:
+            return None
+        if isinstance(cached, bytes):
+            cached = cached.decode('utf-8')
+        return [Section.from_row(row) for row in json.loads(cached)]
+    except Exception as e:
+        print(f"Error reading shared catalog for {semester}: {e}")
+        return None
+
+def save_shared(cache, semester, version, sections, ttl):
+    """Store a semester's rows in the shared cache."""
+    if cache is None:
+        return
+    try:
+        cache.set(shared_key(semester, version), json.dumps([sec.as_row() for sec in sections]), ex=ttl)
+    except Exception as e:
+        print(f"Error writing shared catalog for {semester}: {e}")
+
+def install(catalog):
+    """Use an already loaded Catalog (e.g. from a snapshot) for its semester."""
+    with _lock:
+        _catalogs[catalog.semester] = catalog
+
+def cached_catalog(semester, ttl=3600):
+    """The semester's Catalog if this process has a fresh one loaded, without loading it."""
+    with _lock:
+        catalog = _catalogs.get(semester)
+    if catalog is not None and time.monotonic() - catalog.loaded_at < ttl:
+        return catalog
+    return None
+
+def data_version(semester, fetch_version, check_interval=60):
+    """The semester's data version, fetched at most every check_interval seconds per process."""
+    with _lock:
+        known = _versions.get(semester)
+    if known is not None and time.monotonic() - known[1] < check_interval:
+        return known[0]
+    version = fetch_version(semester)
+    with _lock:
+        _versions[semester] = (version, time.monotonic())
+    return version
+
+def get_catalog(semester, fetch_records, fetch_version, cache=None, ttl=3600, check_interval=60):
+    """
+    Return the Catalog for semester, loading it only when needed.
+
+    fetch_records(semester) returns the semester's course rows as dicts and
+    fetch_version(semester) the current data version (None if unknown, in which
+    case only the TTL applies). cache is the shared cache (get/set with ex=).
+    """
+    with _lock:
+        now = time.monotonic()
+        catalog = _catalogs.get(semester)
+        if catalog is not None and now - catalog.loaded_at < ttl:
+            if now - catalog.checked_at < check_interval:
+                return catalog
+            version = fetch_version(semester)
+            catalog.checked_at = now
+            if version == catalog.version:
+                return catalog
+        else:
+            version = fetch_version(semester)
+
+        sections = load_shared(cache, semester, version)
+        if sections is None:
+            print(f"Loading {semester} catalog from the database (version {version})")
+            sections = [Section.from_record(record) for record in fetch_records(semester)]
+            if sections:
+                save_shared(cache, semester, version, sections, ttl)
+        catalog = Catalog(semester, version, sections)
+        # An empty catalog (e.g. mid-scrape) is not kept, so the next request retries.
+        if sections:
+            _catalogs[semester] = catalog
+        return catalog
@@ -0,0 +1,41 @@
+"""
+Pairwise conflict matrices over meeting_time masks.
+
+Masks are split into 64-bit words and compared all against all with NumPy,
+producing a boolean matrix that answers "do these two overlap" with one
+fancy-indexing lookup instead of a Python loop per pair. utils.partials uses
+cross_conflicts() to check a new course's options against every cached
+schedule at once; benchmarks/bench_conflict_matrix.py validates whole
+combinations in batches against build_conflict_matrix().
+"""
+import numpy as np
+
+from utils import solver
+
+def masks_to_words(masks):
+    """Split Python int masks into an (n, words) array of uint64 words."""
+    words = max(1, max((mask.bit_length() for mask in masks), default=0) + 63 >> 6)
+    out = np.zeros((len(masks), words), dtype=np.uint64)
+    for row, mask in enumerate(masks):
+        if mask:
+            raw = mask.to_bytes(words * 8, "little")
+            out[row] = np.frombuffer(raw, dtype="<u8")
+    return out
+
+def cross_conflicts(rows, columns):
+    """
+    Boolean matrix where matrix[i, j] is True if mask rows[i] overlaps mask
+    columns[j] (both lists of meeting_time masks), compared word by word.
+    """
+    words = masks_to_words(list(rows) + list(columns))
+    return (words[:len(rows), None, :] & words[None, len(rows):, :]).any(axis=2)
+
+def build_conflict_matrix(sections):
+    """
+    Build the boolean matrix where matrix[i, j] is True if sections i and j
+    meet at overlapping times. The diagonal is always False.
+    """
+    masks = [solver.section_mask(sec) for sec in sections]
+    matrix = cross_conflicts(masks, masks)
+    np.fill_diagonal(matrix, False)
+    return matrix
@@ -0,0 +1,59 @@
+"""
+Count-only schedule search.
+
+The results page shows how many valid and distinct schedules exist, which used
+to require enumerating every one of them. Counting can instead walk the same
+search tree and memoize sub-counts: the number of ways to finish a schedule from
+course i on depends only on the time slots already occupied that a remaining
+course could still use, so identical sub-problems reached through different
+choices are counted once. No schedule is ever materialized.
+"""
+from utils import solver
+
+def count_schedules(course_options, weights, budget=None):
+    """
+    For each function in weights, return the sum over every conflict-free schedule
+    of the product of weight(option) over the schedule's options (a weight of 1
+    counts schedules; the size of each option's equivalence classes counts the
+    concrete schedules they stand for). Returns a list with one total per weight,
+    or None if the budget (see utils.budget) runs out before counting finishes.
+    """
+    candidates = solver.compile_options(course_options)
+    if not candidates:
+        return [0] * len(weights)
+    depth = len(candidates)
+    levels = [[(mask, [weight(opt) for weight in weights]) for _, opt, mask in level]
+              for level in candidates]
+    # relevant[level] is every slot an option of a course from level on could occupy;
+    # occupied slots outside it cannot cause a conflict any more.
+    relevant = [0] * (depth + 1)
+    for level in range(depth - 1, -1, -1):
+        relevant[level] = relevant[level + 1]
+        for mask, _ in levels[level]:
+            relevant[level] |= mask
+    memo = [{} for _ in range(depth)]
+    ones = [1] * len(weights)
+
+    def count(level, occupied):
+        if level == depth:
+            return ones
+        key = occupied & relevant[level]
+        cached = memo[level].get(key)
+        if cached is not None:
+            return cached
+        totals = [0] * len(weights)
+        for mask, option_weights in levels[level]:
+            if mask & key:
+                continue
+            if budget is not None and not budget.tick():
+                return totals
+            sub = count(level + 1, key | mask)
+            for i, weight in enumerate(option_weights):
+                totals[i] += weight * sub[i]
+        memo[level][key] = totals
+        return totals
+
+    totals = count(0, 0)
+    if budget is not None and budget.truncated:
+        return None
+    return totals
@@ -0,0 +1,57 @@
+"""
+Time-equivalence classes of sections.
+
+Many courses have several sections that meet on the same days at the same time
+and differ only by room or instructor. Since conflicts depend only on days and
+time, such sections are interchangeable during the search: each class is
+enumerated through a single representative section and only expanded back into
+its member sections when a schedule group is rendered or counted.
+"""
+import itertools
+import math
+
+def class_key(sec):
+    """Sections with the same (course, type, days, time) are time-equivalent."""
+    return (sec.subject_code, sec.section_type, sec.days.strip(), sec.time.strip())
+
+def collapse(sections, members):
+    """
+    Return one representative section per time-equivalence class.
+    Every section is recorded in members (a dict keyed by class_key) so the
+    classes can be expanded again later.
+    """
+    representatives = []
+    for sec in sections:
+        key = class_key(sec)
+        if key not in members:
+            members[key] = []
+            representatives.append(sec)
+        members[key].append(sec)
+    return representatives
+
+def classes_of(schedule, members):
+    """Map a schedule of representatives to its list of member-section classes."""
+    return [members[class_key(rep)] for rep in schedule]
+
+def unique_members(cls):
+    """Members of a class without repeated section numbers (duplicate catalog rows)."""
+    seen = set()
+    unique = []
+    for sec in cls:
+        if sec.section not in seen:
+            seen.add(sec.section)
+            unique.append(sec)
+    return unique
+
+def expand(classes):
+    """Yield every concrete schedule (a list of sections) represented by classes."""
+    for combo in itertools.product(*(unique_members(cls) for cls in classes)):
+        yield list(combo)
+
+def count_valid(classes):
+    """Number of concrete schedules represented by classes, counting every catalog row."""
+    return math.prod(len(cls) for cls in classes)
+
+def count_unique(classes):
+    """Number of distinct schedules represented by classes (see unique_members)."""
+    return math.prod(len(unique_members(cls)) for cls in classes)
@@ -0,0 +1,108 @@
+"""
+Compiled meeting-time model.
+
+A section's days and time strings are parsed once into a single integer bitmask
+covering the whole week: each weekday gets SLOTS_PER_DAY bits, and each bit is a
+SLOT_MINUTES-long slot. Two meeting times overlap exactly when their masks share
+a bit, so conflict and exclusion checks become a single bitwise AND.
+
+CSULB publishes meeting times on 5-minute boundaries, so 5-minute slots keep the
+comparison identical to the old start/end datetime check.
+"""
+from functools import lru_cache
+from datetime import datetime
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEKDAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+DAY_INDEX = {day: i for i, day in enumerate(WEEKDAYS)}
+ALL_DAYS = (1 << len(WEEKDAYS)) - 1
+
+def parse_clock(value, fmt="%I:%M%p"):
+    """Convert a clock string such as "09:00AM" (or "13:30" with fmt="%H:%M") to minutes since midnight."""
+    parsed = datetime.strptime(value.strip(), fmt)
+    return parsed.hour * 60 + parsed.minute
+
+@lru_cache(maxsize=65536)
+def parse_time_range(time_str):
+    """
+    Parse "09:00AM-10:15AM" into (start, end) minutes since midnight.
+    Returns None for empty, "NA" or malformed values.
+    """
+    if not time_str or "NA" in time_str:
+        return None
+    try:
+        start_str, end_str = time_str.replace('Times:', '').strip().split('-')
+        return parse_clock(start_str), parse_clock(end_str)
+    except Exception:
+        return None
+
+@lru_cache(maxsize=65536)
+def day_bits(days):
+    """Convert a days string such as "Monday Wednesday" to a 7-bit weekday mask."""
+    bits = 0
+    for day in days.replace('Days:', '').split():
+        if day in DAY_INDEX:
+            bits |= 1 << DAY_INDEX[day]
+    return bits
+
+def daily_mask(start, end, days=ALL_DAYS):
+    """Build the week mask for the minutes [start, end) on every weekday set in days."""
+    first = start // SLOT_MINUTES
+    last = -(-end // SLOT_MINUTES)
+    if last <= first:
+        return 0
+    one_day = ((1 << (last - first)) - 1) << first
+    mask = 0
+    for i in range(len(WEEKDAYS)):
+        if days & (1 << i):
+            mask |= one_day << (i * SLOTS_PER_DAY)
+    return mask
+
+@lru_cache(maxsize=65536)
+def compile_meeting(days, time_str):
+    """
+    Compile a section's days and time strings into its week mask.
+    Sections without meeting days or times compile to 0 and never conflict.
+    """
+    bits = day_bits(days)
+    window = parse_time_range(time_str)
+    if not bits or window is None:
+        return 0
+    return daily_mask(window[0], window[1], bits)
+
+def parse_meeting(days, time_str):
+    """
+    Parse a section's days and time strings once into (weekday bits, start, end),
+    with start and end in minutes since midnight (None when there is no meeting time).
+    """
+    window = parse_time_range(time_str)
+    if window is None:
+        return day_bits(days), None, None
+    return day_bits(days), window[0], window[1]
+
+@lru_cache(maxsize=65536)
+def compile_parsed(bits, start, end):
+    """Week mask from already parsed meeting fields (see parse_meeting)."""
+    if not bits or start is None or end is None:
+        return 0
+    return daily_mask(start, end, bits)
+
+@lru_cache(maxsize=65536)
+def exclude_range_mask(time_range):
+    """Mask for an "08:00AM-09:00AM" exclusion, which applies to every day of the week."""
+    window = parse_time_range(time_range)
+    if window is None:
+        return 0
+    return daily_mask(window[0], window[1])
+
+def custom_mask(day, custom_start, custom_end):
+    """Mask for a custom ("Monday", "13:00", "14:30") exclusion from the form's time inputs."""
+    if day not in DAY_INDEX:
+        return 0
+    try:
+        start = parse_clock(custom_start, "%H:%M")
+        end = parse_clock(custom_end, "%H:%M")
+    except Exception:
+        return 0
+    return daily_mask(start, end, 1 << DAY_INDEX[day])
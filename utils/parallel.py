@@ -0,0 +1,121 @@
+"""
+Process-pool parallel schedule enumeration.
+
+The search space is partitioned on the options of one course: each worker
+process searches the schedules that use a contiguous slice of that course's
+options, working on option masks only so the tasks are cheap to pickle. The
+workers return the positions of the valid schedules, which are merged in
+lexicographic order, so the result is identical to the serial solver's.
+
+Small requests, and environments where a process pool cannot be started
+(e.g. serverless runtimes without /dev/shm), use the serial solver instead, as
+does a request whose pool broke (a worker was killed, e.g. out of memory); the
+broken pool is discarded so the next request starts a new one.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from utils import solver
+from utils.budget import Budget
+
+_executor = None
+_executor_workers = 0
+
+def get_executor(workers):
+    """Return the process-wide pool, creating it on first use."""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+def reset_executor():
+    """Discard the process-wide pool (e.g. after a worker died); the next use creates a new one."""
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _executor_workers = 0
+
+def serial_choices(masks, budget=None):
+    """valid_choices() in this process, discarding any partial results counted on budget."""
+    if budget is not None:
+        budget.found = 0
+        budget.truncated = False
+    return list(solver.search(masks, budget=budget))
+
+def search_partition(masks, split, positions, seconds=None, max_results=None):
+    """
+    Worker task: search the schedules whose option at level split is one of positions,
+    within its own budget. Returns (choices, explored, truncated), with positions in
+    the full (unsliced) option lists.
+    """
+    sliced = list(masks)
+    sliced[split] = [masks[split][p] for p in positions]
+    worker_budget = Budget(seconds, max_results)
+    found = []
+    for choice in solver.search(sliced, budget=worker_budget):
+        choice = list(choice)
+        choice[split] = positions[choice[split]]
+        found.append(tuple(choice))
+    return found, worker_budget.explored, worker_budget.truncated
+
+def valid_choices(masks, workers=1, threshold=0, budget=None):
+    """
+    List the positions of every conflict-free schedule over masks (one list of
+    option masks per course), in lexicographic order, searching in worker
+    processes when the product size exceeds threshold. Each worker gets the time
+    left on budget; partial results are merged and the budget is marked
+    truncated if any worker ran out.
+    """
+    estimate = math.prod(len(level) for level in masks)
+    if workers <= 1 or estimate <= threshold:
+        return list(solver.search(masks, budget=budget))
+
+    # Split on the course with the most options so there are enough partitions.
+    split = max(range(len(masks)), key=lambda level: len(masks[level]))
+    count = len(masks[split])
+    size = max(1, math.ceil(count / (workers * 4)))
+    partitions = [list(range(i, min(i + size, count))) for i in range(0, count, size)]
+    seconds = budget.remaining() if budget is not None else None
+    max_results = budget.max_results if budget is not None else None
+    try:
+        executor = get_executor(workers)
+        futures = [executor.submit(search_partition, masks, split, positions, seconds, max_results)
+                   for positions in partitions]
+    except Exception as e:
+        print(f"Parallel enumeration unavailable, falling back to serial: {e}")
+        reset_executor()
+        return serial_choices(masks, budget)
+
+    choices = []
+    try:
+        # Workers enforce the deadline themselves; allow a moment to hand results back.
+        for future in as_completed(futures, timeout=seconds + 1 if seconds is not None else None):
+            found, explored, truncated = future.result()
+            choices.extend(found)
+            if budget is not None:
+                budget.explored += explored
+                budget.found += len(found)
+                budget.truncated = budget.truncated or truncated
+                budget.report()
+    except TimeoutError:
+        for future in futures:
+            future.cancel()
+        if budget is not None:
+            budget.truncated = True
+    except BrokenProcessPool as e:
+        print(f"Parallel enumeration failed, falling back to serial: {e}")
+        reset_executor()
+        return serial_choices(masks, budget)
+
+    choices.sort()
+    if budget is not None:
+        if max_results is not None and len(choices) > max_results:
+            choices = choices[:max_results]
+            budget.truncated = True
+        budget.found = len(choices)
+    return choices
@@ -0,0 +1,98 @@
+"""
+Incremental regeneration across requests.
+
+Students usually iterate by adding or dropping a single course and submitting
+again, which used to recompute every schedule from scratch. The valid schedules
+of a request are cached by the set of courses (each course identified by the
+masks of its options, so any change to its sections or the filters gives a
+different key) as a compact array of the chosen option positions. A later
+request for the same set reuses them as is; a request with one more course
+extends the cached schedules of the others with that course, checking the new
+course's options against every cached schedule at once with NumPy. Dropping a
+course back reuses the cache of the request before it was added.
+"""
+import base64
+import hashlib
+import json
+import numpy as np
+
+from utils import conflict_matrix, parallel, solver
+
+def course_key(masks):
+    """Identify a course by the masks of its options, in order."""
+    return hashlib.md5(json.dumps(masks).encode('utf-8')).hexdigest()[:16]
+
+def subset_key(keys):
+    """Cache key for a set of courses (order-independent)."""
+    return "partials:" + hashlib.md5(",".join(sorted(keys)).encode('utf-8')).hexdigest()
+
+def pack(choices):
+    """JSON-friendly form of a (schedules, courses) position array."""
+    return {"shape": list(choices.shape),
+            "data": base64.b64encode(choices.astype(np.uint32).tobytes()).decode('ascii')}
+
+def unpack(value):
+    """Inverse of pack()."""
+    data = np.frombuffer(base64.b64decode(value["data"]), dtype=np.uint32)
+    return data.reshape(value["shape"]).astype(np.intp)
+
+def extend(choices, masks, level):
+    """
+    Insert the course masks[level] into every schedule in choices (a position array
+    over the other courses in masks) and keep the conflict-free results.
+    """
+    others = [i for i in range(len(masks)) if i != level]
+    new_options = masks[level]
+    # fits[n, p] is True if option p of the new course fits cached schedule n.
+    fits = np.ones((len(choices), len(new_options)), dtype=bool)
+    for column, i in enumerate(others):
+        # conflicts[o, p] is True if option o of course i overlaps option p of the new course.
+        conflicts = conflict_matrix.cross_conflicts(masks[i], new_options)
+        fits &= ~conflicts[choices[:, column]]
+    rows, positions = np.nonzero(fits)
+    return np.insert(choices[rows], level, positions, axis=1)
+
+def iter_valid_schedules(course_options, load, save, workers=1, threshold=0, limit=100000, budget=None):
+    """
+    Same schedules, in the same order, as solver.iter_valid_schedules(), reusing
+    the cached results of an earlier request for the same courses or for all but
+    one of them. load(key) and save(key, value) read and write the cache; results
+    are saved when the search completed and has at most limit schedules.
+    """
+    candidates = solver.compile_options(course_options)
+    if not candidates:
+        return
+    depth = len(candidates)
+    keys = [course_key([mask for _, _, mask in level]) for level in candidates]
+    # Work in a canonical course order so cached positions do not depend on the
+    # order the courses were selected in.
+    order = sorted(range(depth), key=lambda i: keys[i])
+    masks = [[mask for _, _, mask in candidates[i]] for i in order]
+    canonical_keys = [keys[i] for i in order]
+
+    cached = load(subset_key(canonical_keys))
+    if cached is not None:
+        choices = unpack(cached)
+    else:
+        for level in range(depth if depth > 1 else 0):
+            cached = load(subset_key(canonical_keys[:level] + canonical_keys[level + 1:]))
+            if cached is not None:
+                print(f"Extending {cached['shape'][0]} cached schedules with one more course")
+                choices = extend(unpack(cached), masks, level)
+                break
+        else:
+            found = parallel.valid_choices(masks, workers, threshold, budget)
+            choices = np.array(found, dtype=np.intp).reshape(len(found), depth)
+        if not (budget is not None and budget.truncated) and len(choices) <= limit:
+            save(subset_key(canonical_keys), pack(choices))
+
+    # Back to the request's course order, sorted as the solver would yield them.
+    choices = choices[:, np.argsort(order)]
+    choices = choices[np.lexsort(choices.T[::-1])]
+    if budget is not None:
+        if budget.max_results is not None and len(choices) > budget.max_results:
+            choices = choices[:budget.max_results]
+            budget.truncated = True
+        budget.found = len(choices)
+    for choice in choices.tolist():
+        yield [sec for i, c in enumerate(choice) for sec in candidates[i][c][1]]
@@ -0,0 +1,139 @@
+"""
+Ranked top-K schedule search.
+
+Instead of enumerating every valid schedule and sorting by signature, the
+solver's depth-first search keeps only the k best schedules in a bounded heap
+and prunes any branch whose lower bound cannot beat the worst schedule kept.
+Scores are tuples compared lexicographically (lower is better): the chosen
+criterion first, then the others as tie-breakers.
+"""
+import heapq
+
+from utils import meeting_time, solver
+
+SORT_OPTIONS = {
+    "days": "Fewest days on campus",
+    "gaps": "Smallest gaps between classes",
+    "end": "Earliest end time",
+    "rating": "Highest professor rating",
+}
+
+# Rating used for sections whose professor has no RateMyProfessors score.
+UNKNOWN_RATING = 2.5
+
+DAY_SLOTS = (1 << meeting_time.SLOTS_PER_DAY) - 1
+
+def week_stats(mask, fillable=0):
+    """
+    Summarize an occupied week mask as (days on campus, idle slots between
+    classes, latest end slot across the week). Idle slots that are also set in
+    fillable are not counted as gaps.
+    """
+    days = gaps = end = 0
+    for day in range(len(meeting_time.WEEKDAYS)):
+        shift = day * meeting_time.SLOTS_PER_DAY
+        slots = (mask >> shift) & DAY_SLOTS
+        if not slots:
+            continue
+        first = (slots & -slots).bit_length() - 1
+        last = slots.bit_length()
+        span = (1 << last) - (1 << first)
+        days += 1
+        gaps += (span & ~slots & ~(fillable >> shift)).bit_count()
+        end = max(end, last)
+    return days, gaps, end
+
+def score(sort_by, mask, average_rating):
+    """Score of a complete schedule; lower is better."""
+    days, gaps, end = week_stats(mask)
+    if sort_by == "days":
+        return (days, gaps, end)
+    if sort_by == "gaps":
+        return (gaps, days, end)
+    if sort_by == "end":
+        return (end, days, gaps)
+    return (-average_rating, days, gaps)
+
+def lower_bound(sort_by, mask, fillable, best_average_rating):
+    """
+    Lower bound on the score of any completion of a partial schedule.
+    Days on campus and the latest end only grow as sections are added; a gap can
+    only shrink if a remaining course could meet during it, so only the idle slots
+    outside fillable (every slot any remaining option occupies) are certain; the
+    rating bound assumes the best-rated option for every remaining course.
+    """
+    days, gaps, end = week_stats(mask, fillable)
+    if sort_by == "days":
+        return (days, gaps, end)
+    if sort_by == "gaps":
+        return (gaps, days, end)
+    if sort_by == "end":
+        return (end, days, gaps)
+    return (-best_average_rating, days, gaps)
+
+def top_schedules(course_options, sort_by, k, rating=None, budget=None):
+    """
+    Return up to k best conflict-free schedules for the sort_by criterion, best
+    first, as (score, schedule) pairs where schedule is a flat list of sections.
+    rating(sec) gives a section's professor rating and is only used by "rating".
+    Ties keep the solver's enumeration order. If the budget runs out, the best
+    schedules found so far are returned and the budget is marked truncated.
+    """
+    candidates = solver.compile_options(course_options)
+    if not candidates or k <= 0:
+        return []
+    depth = len(candidates)
+
+    # Sum of section ratings per option, and the best achievable sum for the
+    # remaining courses from each level on (for the rating bound).
+    rate = rating if (sort_by == "rating" and rating) else (lambda sec: UNKNOWN_RATING)
+    option_ratings = [[sum(rate(sec) for sec in opt) for _, opt, _ in level] for level in candidates]
+    best_rest = [0.0] * (depth + 1)
+    for level in range(depth - 1, -1, -1):
+        best_rest[level] = best_rest[level + 1] + max(option_ratings[level])
+    section_count = sum(len(level[0][1]) for level in candidates) or 1
+    # Every slot that some option of the remaining courses could still occupy.
+    fillable = [0] * (depth + 1)
+    for level in range(depth - 1, -1, -1):
+        fillable[level] = fillable[level + 1]
+        for _, _, opt_mask in candidates[level]:
+            fillable[level] |= opt_mask
+
+    heap = []  # max-heap of the k best: (negated score, negated sequence, schedule)
+    sequence = 0
+    placed = []
+
+    def worst():
+        return tuple(-x for x in heap[0][0])
+
+    def visit(level, mask, rating_sum):
+        nonlocal sequence
+        if len(heap) == k:
+            bound = lower_bound(sort_by, mask, fillable[level],
+                                (rating_sum + best_rest[level]) / section_count)
+            # A completion scoring equal to the worst kept would still lose the tie.
+            if bound >= worst():
+                return
+        if level == depth:
+            if budget is not None and not budget.accept():
+                return
+            sequence += 1
+            entry_score = score(sort_by, mask, rating_sum / section_count)
+            entry = (tuple(-x for x in entry_score), -sequence, [sec for opt in placed for sec in opt])
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry_score < worst():
+                heapq.heapreplace(heap, entry)
+            return
+        for (_, opt, opt_mask), opt_rating in zip(candidates[level], option_ratings[level]):
+            if opt_mask & mask:
+                continue
+            if budget is not None and not budget.tick():
+                return
+            placed.append(opt)
+            visit(level + 1, mask | opt_mask, rating_sum + opt_rating)
+            placed.pop()
+
+    visit(0, 0, 0.0)
+    ranked = sorted(heap, reverse=True)
+    return [(tuple(-x for x in neg_score), schedule) for neg_score, _, schedule in ranked]
@@ -0,0 +1,103 @@
+"""
+Compact section records.
+
+Catalog rows used to be mutable 11-element lists of strings indexed by position
+(sec[5] for days, sec[6] for time, ...). A Section keeps the same fields as
+named slots, interns the strings that repeat across the catalog (subjects,
+section types, days, times, rooms, professors) and carries its meeting time in
+parsed form: weekday bits, start and end minutes since midnight, and the week
+mask compiled from them. The parsed values are stored by the scraper in the
+courses table (day_mask, start_minute, end_minute), so the web tier only parses
+the display strings for rows written before those columns existed.
+
+Sections are immutable by convention; use replace() to derive a modified copy.
+They are stored in the JSON cache as plain rows (see as_row/from_row).
+"""
+import sys
+
+from utils import meeting_time
+
+FIELDS = ("subject_code", "course_name", "units", "section", "section_type", "days",
+          "time", "location", "professor", "availability", "notes")
+# Parsed meeting-time columns of the courses table, in the order of parsed_meeting().
+PARSED_COLUMNS = ("day_mask", "start_minute", "end_minute")
+
+def parse_meeting(days, time):
+    """
+    (weekday bits, start, end) of a section's days and time strings. Sections
+    without meeting times (empty or "NA") have no start and end, so they compile
+    to an empty mask and never conflict.
+    """
+    time_val = (time or "").strip().lower()
+    if "na" in time_val or time_val == "":
+        return meeting_time.day_bits(days or ""), None, None
+    return meeting_time.parse_meeting(days or "", time)
+
+class Section:
+    __slots__ = FIELDS + ("day_bits", "start", "end", "mask")
+
+    def __init__(self, subject_code="", course_name="", units="", section="", section_type="",
+                 days="", time="", location="", professor="", availability="", notes="", parsed=None):
+        intern = sys.intern
+        self.subject_code = intern(subject_code or "")
+        self.course_name = intern(course_name or "")
+        self.units = intern(units or "")
+        self.section = section or ""
+        self.section_type = intern(section_type or "")
+        self.days = intern(days or "")
+        self.time = intern(time or "")
+        self.location = intern(location or "")
+        self.professor = intern(professor or "")
+        self.availability = intern(availability or "")
+        self.notes = notes or ""
+        # parsed is (weekday bits, start, end) when already known (see parse_meeting).
+        if parsed is None:
+            parsed = parse_meeting(self.days, self.time)
+        self.day_bits, self.start, self.end = parsed
+        self.mask = meeting_time.compile_parsed(*parsed)
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Build a Section from a Supabase courses row (a dict keyed by column name),
+        using its parsed meeting-time columns when they are filled in.
+        """
+        parsed = None
+        if record.get("day_mask") is not None:
+            parsed = tuple(record.get(column) for column in PARSED_COLUMNS)
+        return cls(*(record.get(field, "") for field in FIELDS), parsed=parsed)
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a Section from a row in FIELDS order, optionally followed by the parsed meeting time."""
+        if len(row) > len(FIELDS):
+            return cls(*row[:len(FIELDS)], parsed=tuple(row[len(FIELDS):]))
+        return cls(*row)
+
+    def as_row(self):
+        """The section's fields in FIELDS order followed by the parsed meeting time, for JSON caching."""
+        return [getattr(self, field) for field in FIELDS] + list(self.parsed_meeting())
+
+    def as_record(self):
+        """The section as a courses table row (without the semester)."""
+        record = {field: getattr(self, field) for field in FIELDS}
+        record.update(zip(PARSED_COLUMNS, self.parsed_meeting()))
+        return record
+
+    def replace(self, **changes):
+        """Return a copy of the section with some fields changed."""
+        values = {field: getattr(self, field) for field in FIELDS}
+        values.update(changes)
+        return Section(**values)
+
+    def parsed_meeting(self):
+        """(weekday bits, start, end) of the meeting time, as in parse_meeting()."""
+        return self.day_bits, self.start, self.end
+
+    @property
+    def has_meeting_time(self):
+        """True if the section meets at a scheduled time (not online or TBA)."""
+        return self.time.strip().lower() not in ("", "na")
+
+    def __repr__(self):
+        return f"Section({self.subject_code!r}, {self.section!r}, {self.section_type!r}, {self.days!r}, {self.time!r})"
@@ -0,0 +1,86 @@
+"""
+Binary catalog snapshots.
+
+The scheduled update writes the semester catalog as one MessagePack blob
+(msgspec) in which every section carries its meeting time already parsed into
+weekday bits and start/end minutes. A cold web instance can then load the whole
+catalog with a single read (memory-mapped when it is a local file) instead of
+paging through Supabase and decoding JSON.
+"""
+import mmap
+import os
+import time
+from typing import Optional
+
+import msgspec
+
+from utils.section import Section
+
+# Bumped whenever the layout below changes; older snapshots are ignored.
+FORMAT_VERSION = 1
+
+class SnapshotSection(msgspec.Struct, array_like=True):
+    subject_code: str
+    course_name: str
+    units: str
+    section: str
+    section_type: str
+    days: str
+    time: str
+    location: str
+    professor: str
+    availability: str
+    notes: str
+    day_bits: int
+    start: Optional[int]
+    end: Optional[int]
+
+class Snapshot(msgspec.Struct):
+    format: int
+    semester: str
+    version: Optional[str]
+    created: float
+    sections: list[SnapshotSection]
+
+_decoder = msgspec.msgpack.Decoder(Snapshot)
+
+def encode(semester, version, sections):
+    """Serialize a semester's Section records into snapshot bytes."""
+    rows = []
+    for sec in sections:
+        rows.append(SnapshotSection(*sec.as_row()))
+    return msgspec.msgpack.encode(Snapshot(FORMAT_VERSION, semester, version, time.time(), rows))
+
+def decode(data):
+    """
+    Parse snapshot bytes into (semester, version, created, sections), or None if
+    the data is not a snapshot in the current format.
+    """
+    try:
+        snapshot = _decoder.decode(data)
+    except (msgspec.DecodeError, msgspec.ValidationError) as e:
+        print(f"Ignoring unreadable catalog snapshot: {e}")
+        return None
+    if snapshot.format != FORMAT_VERSION:
+        return None
+    sections = [Section(row.subject_code, row.course_name, row.units, row.section, row.section_type,
+                        row.days, row.time, row.location, row.professor, row.availability, row.notes,
+                        parsed=(row.day_bits, row.start, row.end))
+                for row in snapshot.sections]
+    return snapshot.semester, snapshot.version, snapshot.created, sections
+
+def write(path, data):
+    """Write snapshot bytes to path atomically (readers never see a partial file)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def read(path):
+    """Load a snapshot file through a memory map; returns decode()'s result or None."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return decode(data)
+    except (OSError, ValueError) as e:
+        print(f"Catalog snapshot {path} not loaded: {e}")
+        return None
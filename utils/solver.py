@@ -0,0 +1,125 @@
+import bisect
+
+def section_mask(sec):
+    """
+    Week bitmask of a section's meeting time (see utils.meeting_time), compiled
+    when the Section was loaded. Sections without meeting times have an empty mask.
+    """
+    return sec.mask
+
+def sections_conflict(sec1, sec2):
+    """Return True if two sections meet at overlapping times."""
+    return bool(section_mask(sec1) & section_mask(sec2))
+
+def option_mask(option):
+    """
+    Combined mask of a single course option (e.g. a lecture and its lab),
+    or None if the option's own sections conflict with each other.
+    """
+    mask = 0
+    for sec in option:
+        sec_mask = section_mask(sec)
+        if mask & sec_mask:
+            return None
+        mask |= sec_mask
+    return mask
+
+def compile_options(course_options):
+    """
+    Pair every course option with its original index and combined mask:
+    [[(index, option, mask), ...] per course]. Options whose own sections overlap
+    can never be part of a valid schedule and are dropped; returns None if that
+    leaves a course (or the request) without options.
+    """
+    if not course_options:
+        return None
+    candidates = []
+    for options in course_options:
+        compiled = []
+        for index, opt in enumerate(options):
+            mask = option_mask(opt)
+            if mask is not None:
+                compiled.append((index, opt, mask))
+        if not compiled:
+            return None
+        candidates.append(compiled)
+    return candidates
+
+def iter_valid_schedules(course_options, budget=None):
+    """
+    Yield every conflict-free schedule, one course at a time.
+
+    course_options is a list with one entry per course; each entry is a list of
+    options, and each option is a tuple of sections (one per required section type).
+    Courses are assigned in order and every new option is only checked against the
+    time already occupied by the placed sections (a single bitwise AND), so the
+    search backtracks on the first conflict instead of building the full cartesian
+    product.
+
+    Schedules are yielded as flat lists of sections, in the same order that
+    itertools.product over the options would produce them. With a budget (see
+    utils.budget) the search stops early once it is exhausted.
+    """
+    for _, schedule in iter_schedules_from(course_options, budget=budget):
+        yield schedule
+
+def iter_schedules_from(course_options, cursor=None, budget=None):
+    """
+    Resumable form of iter_valid_schedules().
+
+    Yields (cursor, schedule) pairs, where cursor is the list of option indices
+    (one per course) that produced the schedule. Passing a previously yielded
+    cursor back in resumes the search at that schedule, so a caller can stop after
+    a page of results and continue later without re-enumerating earlier ones.
+    If a budget stops the search, budget.cursor is set to the point to resume from.
+    """
+    candidates = compile_options(course_options)
+    if not candidates:
+        return
+    start = None
+    if cursor:
+        # Map the cursor's option indices back to positions among the candidates.
+        start = [bisect.bisect_left([c[0] for c in level], index)
+                 for level, index in zip(candidates, cursor)]
+    masks = [[mask for _, _, mask in level] for level in candidates]
+    for choice in search(masks, start, budget):
+        position = [candidates[i][c][0] for i, c in enumerate(choice)]
+        yield position, [sec for i, c in enumerate(choice) for sec in candidates[i][c][1]]
+    if budget is not None and budget.cursor is not None:
+        budget.cursor = [candidates[i][c][0] for i, c in enumerate(budget.cursor)]
+
+def search(masks, start=None, budget=None):
+    """
+    Depth-first search over option masks only (one list of masks per course).
+    Yields the chosen position at every level for each conflict-free schedule,
+    in lexicographic order, starting at the positions in start if given.
+    When the budget runs out, budget.cursor is set to the positions to resume from.
+    """
+    depth = len(masks)
+    if not depth:
+        return
+    choice = list(start) if start else [0] * depth
+    occupied = [0] * (depth + 1)  # occupied[level] is the mask placed before that level
+    level = 0
+    while level >= 0:
+        options = masks[level]
+        taken = occupied[level]
+        # Find the next option at this level that fits the sections placed so far.
+        while choice[level] < len(options) and options[choice[level]] & taken:
+            choice[level] += 1
+        if choice[level] == len(options):
+            # Exhausted this level: backtrack.
+            choice[level] = 0
+            level -= 1
+            if level >= 0:
+                choice[level] += 1
+            continue
+        if budget is not None and not (budget.tick() and (level < depth - 1 or budget.accept())):
+            budget.cursor = tuple(choice)
+            return
+        if level == depth - 1:
+            yield tuple(choice)
+            choice[level] += 1
+        else:
+            occupied[level + 1] = taken | options[choice[level]]
+            level += 1
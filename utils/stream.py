@@ -0,0 +1,53 @@
+"""
+Incremental (streaming) pagination over the schedule solver.
+
+Instead of enumerating every valid schedule before showing page 1, a page is
+built by resuming the solver from a saved cursor and collecting schedules until
+page_size distinct schedule patterns (signatures) have been found. The cursor of
+the first schedule that did not fit is returned so the next page can resume
+there. Schedules of a pattern can come after that cursor, so a pattern may
+appear again on a later page; the signatures already shown are remembered so
+such groups are marked as continuations of an earlier page's pattern.
+"""
+import hashlib
+import json
+
+from utils import solver
+
+def signature_key(sig):
+    """Short, JSON-friendly key for a schedule signature (used in the seen set)."""
+    return hashlib.md5(json.dumps(sig).encode('utf-8')).hexdigest()[:16]
+
+def collect_page(course_options, cursor, seen, page_size, signature, budget=None):
+    """
+    Collect the next page of schedule patterns starting at cursor.
+
+    signature(schedule) groups schedules into patterns. seen is a set of signature
+    keys from earlier pages; it is updated in place with the patterns on this page.
+    Every schedule lands on exactly one page.
+
+    Returns (groups, next_cursor, continued), where groups is a list of
+    (signature, [schedules]) in the order the patterns were found, next_cursor is
+    None once the search space is exhausted, and continued is the set of this
+    page's signatures that were already shown on an earlier page. If the budget
+    runs out first, the page is returned short and next_cursor resumes where the
+    search stopped.
+    """
+    groups = {}
+    continued = set()
+    for position, schedule in solver.iter_schedules_from(course_options, cursor, budget):
+        sig = signature(schedule)
+        if sig in groups:
+            groups[sig].append(schedule)
+            continue
+        if len(groups) == page_size:
+            return list(groups.items()), position, continued
+        key = signature_key(sig)
+        if key in seen:
+            continued.add(sig)
+        else:
+            seen.add(key)
+        groups[sig] = [schedule]
+    if budget is not None and budget.truncated:
+        return list(groups.items()), budget.cursor, continued
+    return list(groups.items()), None, continued